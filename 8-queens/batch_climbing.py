@@ -0,0 +1,218 @@
+import numpy as np
+
+class QueensBatch(object):
+    """ A batch of B N-queens boards stored as one (B, n) array.
+
+        Holds the same column, diagonal and anti-diagonal counters as Queens but
+        with one row per board, so every board is scored and moved at once.
+
+        Attributes:
+            n (int): Number of queens on each board.
+
+            cols (ndarray): (B, n) column of the queen of every row.
+
+            col_counts (ndarray): (B, n) queens in each column.
+
+            diag_counts (ndarray): (B, 2n - 1) queens on each diagonal, indexed
+                by row - col + n - 1.
+
+            anti_counts (ndarray): (B, 2n - 1) queens on each anti-diagonal,
+                indexed by row + col.
+
+            conflicts (ndarray): (B,) total conflicts of every board.
+    """
+    def __init__(self, n, cols):
+        self.n = n
+        self.cols = cols
+        self.reset_counters()
+
+    @classmethod
+    def random(cls, n, size, rng):
+        """ Creates a batch of random boards with one queen per row.
+
+            Args:
+                n (int): Number of queens.
+
+                size (int): Number of boards.
+
+                rng (Generator): Random generator.
+        """
+        return cls(n, rng.integers(n, size=(size, n)))
+
+    def __len__(self):
+        return len(self.cols)
+
+    def reset_counters(self):
+        """ Recomputes the counters and conflicts of every board. """
+        n, size = self.n, len(self.cols)
+        rows = np.arange(n)
+        offsets = np.arange(size)[:, None]
+
+        def count(lines, width):
+            flat = (offsets * width + lines).ravel()
+            return np.bincount(flat, minlength=size * width).reshape(size, width)
+
+        self.col_counts = count(self.cols, n)
+        self.diag_counts = count(rows - self.cols + n - 1, 2 * n - 1)
+        self.anti_counts = count(rows + self.cols, 2 * n - 1)
+        self.conflicts = sum(
+            (counts * (counts - 1) // 2).sum(axis=1) for counts in [
+                self.col_counts, self.diag_counts, self.anti_counts])
+
+    def neighbors(self):
+        """ Scores every neighbor of every board, see Queens.neighbors().
+
+            Returns:
+                A (B, n, n) int64 ndarray of conflict changes, the queens'
+                current columns hold the largest int64.
+        """
+        n, size = self.n, len(self.cols)
+        boards = np.arange(size)[:, None]
+        rows = np.arange(n)
+        removed = (np.take_along_axis(self.col_counts, self.cols, axis=1) +
+                   self.diag_counts[boards, rows - self.cols + n - 1] +
+                   self.anti_counts[boards, rows + self.cols] - 3)
+        diags = rows[:, None] - rows[None, :] + n - 1 # [row, col]
+        antis = rows[:, None] + rows[None, :]
+        costs = (self.col_counts[:, None, :] +
+                 self.diag_counts[:, diags] +
+                 self.anti_counts[:, antis] -
+                 removed[:, :, None]).astype(np.int64)
+        costs[boards, rows, self.cols] = np.iinfo(np.int64).max
+
+        return costs
+
+    def move(self, rows, cols, costs):
+        """ Moves the queen of one row on every board.
+
+            Args:
+                rows (ndarray): (B,) row of the queen to move on each board.
+
+                cols (ndarray): (B,) column to move each queen to.
+
+                costs (ndarray): (B,) change in conflicts of each move.
+        """
+        n = self.n
+        boards = np.arange(len(self.cols))
+        old = self.cols[boards, rows]
+        self.col_counts[boards, old] -= 1
+        self.diag_counts[boards, rows - old + n - 1] -= 1
+        self.anti_counts[boards, rows + old] -= 1
+        self.col_counts[boards, cols] += 1
+        self.diag_counts[boards, rows - cols + n - 1] += 1
+        self.anti_counts[boards, rows + cols] += 1
+        self.cols[boards, rows] = cols
+        self.conflicts += costs
+
+    def replace(self, mask, other):
+        """ Replaces the boards selected by mask with the boards of other.
+
+            Args:
+                mask (ndarray): (B,) bool mask of the boards to replace.
+
+                other (QueensBatch): Batch holding mask.sum() boards.
+        """
+        for name in ['cols', 'col_counts', 'diag_counts', 'anti_counts',
+                     'conflicts']:
+            getattr(self, name)[mask] = getattr(other, name)
+
+    def keep(self, mask):
+        """ Drops every board not selected by mask. """
+        for name in ['cols', 'col_counts', 'diag_counts', 'anti_counts',
+                     'conflicts']:
+            setattr(self, name, getattr(self, name)[mask])
+
+def batch_hill_climbing(htype, n, epochs, batch_size=1024, threshold=100,
+                        rng=None):
+    """ Runs hill climbing epochs on a batch of boards with array operations.
+
+        Every step moves one queen on each board of the batch, choosing among
+        the equally minimal neighbors at random like random_minimum_neighbor().
+        A board that succeeds or fails is retired and its slot is refilled with
+        a new random board until every epoch has been started. Each board
+        follows the same rules as the matching HillClimbing method, including
+        the steps of random-restarts only counting the last restart.
+
+        Args:
+            htype (str): Hill climbing algorithm, basic, sideways or
+                random-restarts.
+
+            n (int): Number of queens.
+
+            epochs (int): Number of boards to climb.
+
+            batch_size (int): Number of boards climbed at once. Each step
+                allocates batch_size * n * n costs, so lower it for large n.
+
+            threshold (int): Threshold number sideways moves allowed, basic
+                uses 1.
+
+            rng (Generator): Random generator.
+
+        Returns:
+            Three ndarrays of the epochs in the order they finished: success
+            (bool), steps and restarts.
+    """
+    if htype not in ['basic', 'sideways', 'random-restarts']:
+        raise ValueError("Invalid htype given!")
+    rng = np.random.default_rng() if rng is None else rng
+
+    size = min(batch_size, epochs)
+    boards = QueensBatch.random(n, size, rng)
+    steps = np.zeros(size, dtype=np.int64)
+    sideways = np.zeros(size, dtype=np.int64)
+    restarts = np.zeros(size, dtype=np.int64)
+    started = size
+    results = {'success': [], 'steps': [], 'restarts': []}
+
+    while len(boards):
+        steps += 1
+        current_h = boards.conflicts.copy()
+        costs = boards.neighbors().reshape(len(boards), -1)
+
+        # Random tie-breaking: the smallest random key among the minimal costs
+        minimal = costs == costs.min(axis=1, keepdims=True)
+        keys = np.where(minimal, rng.random(costs.shape), 2.0)
+        rows, cols = np.divmod(keys.argmin(axis=1), n)
+        boards.move(rows, cols, costs[np.arange(len(boards)), rows * n + cols])
+        next_h = boards.conflicts
+
+        sideways = np.where(next_h == current_h, sideways + 1,
+                            np.where(next_h < current_h, 0, sideways))
+        success = next_h == 0
+        if htype == 'basic':
+            failed = ~success & (next_h >= current_h)
+        else:
+            failed = ~success & ((next_h > current_h) | (sideways >= threshold))
+
+        # Random restarts replace failed boards in place
+        if htype == 'random-restarts' and failed.any():
+            count = int(failed.sum())
+            boards.replace(failed, QueensBatch.random(n, count, rng))
+            steps[failed] = 0
+            sideways[failed] = 0
+            restarts[failed] += 1
+            failed[:] = False
+
+        done = success | failed
+        if not done.any():
+            continue
+        results['success'].append(success[done])
+        results['steps'].append(steps[done])
+        results['restarts'].append(restarts[done])
+
+        # Refill the retired slots with new epochs, dropping the rest
+        refill = np.flatnonzero(done)[:epochs - started]
+        if len(refill):
+            mask = np.zeros(len(boards), dtype=bool)
+            mask[refill] = True
+            boards.replace(mask, QueensBatch.random(n, len(refill), rng))
+            steps[mask], sideways[mask], restarts[mask] = 0, 0, 0
+            started += len(refill)
+            done[refill] = False
+        if done.any():
+            boards.keep(~done)
+            steps, sideways, restarts = steps[~done], sideways[~done], restarts[~done]
+
+    return tuple(np.concatenate(results[key])
+                 for key in ['success', 'steps', 'restarts'])
@@ -0,0 +1,287 @@
+import time
+import multiprocessing
+
+import numpy as np
+
+from queens import Queens
+from hill_climbing import HillClimbing, MinConflicts, SimulatedAnnealing, TabuSearch
+from batch_climbing import batch_hill_climbing
+
+HTYPES = ['basic', 'sideways', 'random-restarts', 'min-conflicts', 'annealing',
+          'tabu', 'first-choice']
+
+# Searches that only need the first board and their options
+SEARCHES = {
+    'min-conflicts': MinConflicts.solve,
+    'annealing': SimulatedAnnealing.solve,
+    'tabu': TabuSearch.solve,
+}
+
+def run_epoch(job):
+    """ Runs one epoch of a local search on a new board, used by the workers.
+
+        Args:
+            job (tuple): (epoch, htype, n, threshold, seed, verbose, options)
+                where seed is the SeedSequence of the epoch and options are
+                extra keyword arguments of the search. The start option picks
+                the first board, random or greedy (Queens.populate_greedy()),
+                min-conflicts starts greedy by default.
+
+        Returns:
+            True or False if a solution was found or not, the number of steps
+            it took and the number of restarts.
+    """
+    epoch, htype, n, threshold, seed, verbose, options = job
+    if verbose:
+        print("{:=^50d}".format(epoch + 1))
+    queens = Queens(n=n, rng=np.random.default_rng(seed))
+
+    options = dict(options)
+    start = options.pop('start', None) or (
+        'greedy' if htype == 'min-conflicts' else 'random')
+    if start == 'greedy':
+        queens.populate_greedy()
+    elif start == 'random':
+        queens.populate_board(seed=None)
+    else:
+        raise ValueError("Invalid start given!")
+
+    if htype in SEARCHES:
+        successful, steps = SEARCHES[htype](queens, verbose=verbose, **options)
+        return successful, steps, 0
+
+    if htype == 'basic':
+        successful, steps = HillClimbing.basic(queens, verbose=verbose)
+        return successful, steps, 0
+    elif htype == 'sideways':
+        successful, steps = HillClimbing.sideways_moves(
+            queens, threshold, verbose=verbose)
+        return successful, steps, 0
+    elif htype == 'random-restarts':
+        return HillClimbing.random_restarts(queens, threshold, verbose=verbose)
+    elif htype == 'first-choice':
+        successful, steps = HillClimbing.first_choice(
+            queens, threshold, verbose=verbose, **options)
+        return successful, steps, 0
+    else:
+        raise ValueError("Invalid htype given!")
+
+def run_batch_epochs(job):
+    """ Runs a block of epochs with the batched climber, used by the workers.
+
+        Args:
+            job (tuple): (epochs, htype, n, threshold, seed, batch_size) where 
+                seed is the SeedSequence of the block.
+
+        Returns:
+            A list of (successful, steps, restarts) sums, one for successes and
+            one for failures, where successful is the number of epochs.
+    """
+    epochs, htype, n, threshold, seed, batch_size = job
+    success, steps, restarts = batch_hill_climbing(
+        htype, n, epochs, batch_size=batch_size, threshold=threshold, 
+        rng=np.random.default_rng(seed))
+
+    return [(int(mask.sum()), int(steps[mask].sum()), int(restarts[mask].sum()))
+            for mask in [success, ~success]]
+
+# Set by the first chain of a race that finds a solution, see init_race()
+stop_event = None
+
+def init_race(stop):
+    """ Shares the stop event of a race with a worker process. """
+    global stop_event
+    stop_event = stop
+
+def run_chain(job):
+    """ Runs a chain of random restarts until it succeeds or the race is over.
+
+        A chain that finds a solution sets the shared stop event so the other
+        chains give up at their next step (cooperative cancellation).
+
+        Args:
+            job (tuple): (n, threshold, seed) where seed is the SeedSequence
+                of the chain.
+
+        Returns:
+            True or False if the chain found the solution, the steps of all its
+            climbs and the number of restarts it took.
+    """
+    n, threshold, seed = job
+    queens = Queens(n=n, rng=np.random.default_rng(seed))
+    steps, restarts = 0, 0
+
+    while not stop_event.is_set():
+        queens.populate_board(seed=None)
+        successful, climb_steps = HillClimbing.sideways_moves(
+            queens, threshold, verbose=False, stop=stop_event)
+        steps += climb_steps
+        if successful:
+            stop_event.set()
+            return True, steps, restarts
+        if not stop_event.is_set():
+            restarts += 1
+
+    return False, steps, restarts
+
+def race_restarts(n, threshold, seeds, stop, pool=None):
+    """ Races one random restart chain per seed and stops at the first solution.
+
+        The stop event is cleared before the race and set by the winning
+        chain. All chains are waited for so their 
+        work is counted, the losers return within one step of the win.
+
+        Args:
+            n (int): Number of queens.
+
+            threshold (int): Threshold number sideways moves allowed.
+
+            seeds (list): SeedSequence of every chain.
+
+            stop (Event): Stop event shared with the chains by init_race().
+
+            pool (Pool): Pool initialized with init_race(stop), if None the
+                chains run in this process one after another.
+
+        Returns:
+            True or False if a solution was found or not and the steps and
+            restarts summed over all chains.
+    """
+    stop.clear()
+    jobs = [(n, threshold, s) for s in seeds]
+    results = list(pool.imap_unordered(run_chain, jobs) if pool else
+                   map(run_chain, jobs))
+
+    return (any(r[0] for r in results), sum(r[1] for r in results),
+            sum(r[2] for r in results))
+
+def print_stats(successes, failures, epochs, restarts=False):
+    """ Prints the success and failure rates and averages.
+
+        Args:
+            successes (dict): Count, steps and restarts summed over successes.
+
+            failures (dict): Count, steps and restarts summed over failures.
+
+            epochs (int): Number of epochs ran.
+
+            restarts (bool): If true the average restarts are printed too.
+    """
+    print("{:=^50s}".format("Stats"))
+    for name, stats in [("Success", successes), ("Failure", failures)]:
+        print("{} Stats".format(name))
+        print("-Rate: {:.2f}".format(stats['count'] / epochs))
+        print("-Steps: {:.2f}".format(stats['steps'] / stats['count']))
+        if restarts:
+            print("-Restarts: {:.2f}".format(stats['restarts'] / stats['count']))
+
+def run_experiment(htype, n, epochs=1, seed=None, threshold=100, workers=None,
+                   verbose=False, batch_size=None, options=None, race=False):
+    """ Runs a hill climbing algorithm for a number of epochs and prints the stats.
+
+        Every epoch gets its own generator spawned from a SeedSequence of the
+        master seed, so the results only depend on the seed and not on how the
+        epochs are split across the process pool. With a batch_size the epochs
+        are instead split into blocks of batch_size * 4 epochs, each climbed by
+        batch_hill_climbing() with its own spawned generator.
+
+        With race set every epoch is instead raced by one random restart chain
+        per worker (see race_restarts()) and its steps and restarts are summed
+        over the chains, so the time to the first solution drops with the
+        number of cores.
+
+        Args:
+            htype (str): Local search algorithm, basic, sideways, 
+                random-restarts, min-conflicts, annealing, tabu or 
+                first-choice.
+
+            n (int): Number of queens.
+
+            epochs (int): Number of epochs to run before calculating averages.
+
+            seed (int): Master seed. If None a random one is drawn and printed
+                so the run can be repeated.
+
+            threshold (int): Threshold number sideways moves allowed, used by
+                sideways, random-restarts and first-choice.
+
+            workers (int): Number of processes, None uses all cores and 1 runs
+                the epochs in this process.
+
+            verbose (bool): If true every board and its stats are printed.
+                Ignored when batch_size is set.
+
+            batch_size (int): If set, number of boards each worker climbs at 
+                once with array operations. Only basic, sideways and
+                random-restarts can be batched.
+
+            options (dict): Extra keyword arguments of the search, e.g.
+                max_steps and walk of MinConflicts.solve(), and the start 
+                board (see run_epoch()).
+
+            race (bool): If true the random-restarts epochs are raced across 
+                the workers one after another. Ignores verbose.
+
+        Returns:
+            The success and failure stats (count, steps and restarts).
+    """
+    if htype not in HTYPES:
+        raise ValueError("Invalid htype given!")
+    if batch_size and htype not in HTYPES[:3]:
+        raise ValueError("{} can not be batched!".format(htype))
+    if race and (htype != 'random-restarts' or batch_size):
+        raise ValueError("Only unbatched random-restarts can be raced!")
+    options = options or {}
+    start_time = time.time()
+    master = np.random.SeedSequence(seed)
+    print("Seed: {}".format(master.entropy))
+    if batch_size:
+        block = batch_size * 4
+        sizes = [min(block, epochs - start) for start in range(0, epochs, block)]
+        jobs = [(size, htype, n, threshold, s, batch_size) 
+                for size, s in zip(sizes, master.spawn(len(sizes)))]
+        func = run_batch_epochs
+    else:
+        jobs = [(e, htype, n, threshold, s, verbose, options) 
+                for e, s in enumerate(master.spawn(epochs))]
+        func = run_epoch
+
+    successes = {'count': np.finfo(float).eps, 'steps' : 0, 'restarts': 0}
+    failures = {'count': np.finfo(float).eps, 'steps' : 0, 'restarts': 0}
+
+    def record(results):
+        for result in results:
+            if batch_size:
+                blocks = zip([successes, failures], result)
+            else:
+                successful, steps, restarts = result
+                blocks = [(successes if successful else failures, (1, steps, restarts))]
+            for stats, (count, steps, restarts) in blocks:
+                stats['count'] += count
+                stats['steps'] += steps
+                stats['restarts'] += restarts
+
+    if race:
+        workers = workers or multiprocessing.cpu_count()
+        stop = multiprocessing.Event()
+        # Every epoch seed spawns the seeds of its chains
+        chains = [job[4].spawn(workers) for job in jobs]
+        if workers == 1:
+            init_race(stop)
+            record(race_restarts(n, threshold, c, stop) for c in chains)
+        else:
+            with multiprocessing.Pool(
+                    workers, initializer=init_race, initargs=(stop,)) as pool:
+                record(race_restarts(n, threshold, c, stop, pool) for c in chains)
+    elif workers == 1:
+        record(map(func, jobs))
+    else:
+        workers = workers or multiprocessing.cpu_count()
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with multiprocessing.Pool(workers) as pool:
+            record(pool.imap(func, jobs, chunksize=chunksize))
+
+    print_stats(successes, failures, epochs, restarts=htype == 'random-restarts')
+    print("Time: {:.2f}s".format(time.time() - start_time))
+
+    return successes, failures
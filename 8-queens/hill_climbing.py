@@ -1,63 +1,135 @@
+import math
+import itertools
+import collections
+
 import numpy as np
 from queens import Queens
 
-def random_minimum_neighbor(conflicts):
+def random_minimum_neighbor(conflicts, rng=None):
     """ Randomly selects neighbor from equally minimal neighbors.
 
         Args:
-            conflicts (list): List of intergets holding the conflicts for each
-                neighbor generated. 
+            conflicts (ndarray): Conflicts (or change in conflicts) of each
+                neighbor generated, e.g. the (n, n) matrix of Queens.neighbors.
+
+            rng (Generator): Random generator used to break ties. If None a 
+                fresh unseeded generator is used.
+
+        Returns:
+            The index of the chosen neighbor, a (row, col) tuple for matrices.
     """
-    np.random.seed(None)
+    rng = np.random.default_rng() if rng is None else rng
+    conflicts = np.asarray(conflicts)
     min_conflict = np.min(conflicts)
-    min_conflict_locs = np.where(conflicts == min_conflict)[0]
+    min_conflict_locs = np.flatnonzero(conflicts == min_conflict)
     # print("choices: {}".format(len(min_conflict_locs)))
+    idx = min_conflict_locs[rng.integers(len(min_conflict_locs))]
+
+    if conflicts.ndim > 1:
+        return tuple(int(i) for i in np.unravel_index(idx, conflicts.shape))
+    return idx
+
+def temperature(schedule, t0, step, alpha=0.999, max_steps=100000, t_min=1e-3):
+    """ Temperature of a cooling schedule at a step.
+
+        Args:
+            schedule (str): exponential (t0 * alpha^step), linear (from t0 down
+                to t_min over max_steps) or logarithmic (t0 / ln(step + e)).
+
+            t0 (float): Starting temperature.
+
+            step (int): Number of steps taken so far.
+
+            alpha (float): Cooling rate of the exponential schedule.
+
+            max_steps (int): Length of the linear schedule.
+
+            t_min (float): Lowest temperature returned.
+
+        Returns:
+            The temperature, never lower than t_min.
+    """
+    if schedule == 'exponential':
+        t = t0 * alpha ** step
+    elif schedule == 'linear':
+        t = t0 - (t0 - t_min) * step / max_steps
+    elif schedule == 'logarithmic':
+        t = t0 / math.log(step + math.e)
+    else:
+        raise ValueError("Invalid schedule given!")
+    return max(t, t_min)
+
+def square_keys(rows, cols, n):
+    """ Pseudo random 64 bit keys of squares, used to hash boards.
 
-    return np.random.choice(min_conflict_locs, 1)[0]
+        The key of a square is the splitmix64 mix of its index, so no (n, n)
+        table of keys has to be stored and the hash of a board, the sum of the
+        keys of its queens, is updated in O(1) when a queen moves.
+
+        Args:
+            rows (ndarray): Rows of the squares.
+
+            cols (ndarray): Columns of the squares.
+
+            n (int): Number of queens.
+
+        Returns:
+            A uint64 ndarray of keys.
+    """
+    x = np.asarray(rows, dtype=np.uint64) * np.uint64(n) + \
+        np.asarray(cols, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
 
 class HillClimbing(object):
 
     @staticmethod
-    def basic(queens):
+    def basic(queens, verbose=True):
         """ Basic hill climbing algorithm that terminates on increased heuristic 
             (conflicts) and will randomly select from equally minimal neighbors.
 
             Args:
                 queens (Queens): Queens object for N-queens problem.
+
+                verbose (bool): If true every board and its stats are printed.
             
             Returns:
                 True or False if a solution was found or not and the number of 
                 steps it took.
         """
         steps = 0
-        queens.print_board()
-        print("conflicts: {}".format(queens.heuristic()))
+        if verbose:
+            queens.print_board()
+            print("conflicts: {}".format(queens.heuristic()))
 
         while True:
             steps += 1
             current_h = queens.heuristic()
-            neighbors, conflicts = queens.neighbors()
+            costs = queens.neighbors()
 
             # Find the neighbor with the smallest amount of conflicts (h) 
-            min_idx = random_minimum_neighbor(conflicts)
-            next_state = queens.coords_to_board(neighbors[min_idx])
-            next_state_h = conflicts[min_idx]
+            row, col = random_minimum_neighbor(costs, queens.rng)
+            next_state_h = current_h + int(costs[row, col])
 
             # Print board and stats    
-            queens.board = next_state
-            queens.print_board()
-            print("conflicts: {}".format(next_state_h))
-            print("step: {}".format(steps))
+            queens.move(row, col)
+            if verbose:
+                queens.print_board()
+                print("conflicts: {}".format(next_state_h))
+                print("step: {}".format(steps))
 
             if next_state_h == 0:
-                print("SUCCESS!")
+                if verbose:
+                    print("SUCCESS!")
                 return True, steps
             if next_state_h >= current_h:
-                print("FAILED!")
+                if verbose:
+                    print("FAILED!")
                 return False, steps
 
     @staticmethod
-    def sideways_moves(queens, threshold=100):
+    def sideways_moves(queens, threshold=100, verbose=True, stop=None):
         """ Sideways move hill climbing algorithm that terminates when the 
             sideways move threshold is exceeded. This algorithm will also 
             randomly select from equally minimal neighbors. Setting the 
@@ -67,6 +139,11 @@ class HillClimbing(object):
                 queens (Queens): Queens object for N-queens problem.
 
                 threshold (int): Number of sideways steps allowed.
+
+                verbose (bool): If true every board and its stats are printed.
+
+                stop (Event): If given the climb gives up as soon as it is set,
+                    checked before every step.
             
             Returns:
                 True or False if a solution was found or not and the number of 
@@ -74,18 +151,22 @@ class HillClimbing(object):
         """
         side_counter = 0
         steps = 0
-        queens.print_board()
-        print("conflicts: {}".format(queens.heuristic()))
+        if verbose:
+            queens.print_board()
+            print("conflicts: {}".format(queens.heuristic()))
 
         while True:
+            if stop is not None and stop.is_set():
+                if verbose:
+                    print("STOPPED!")
+                return False, steps
             steps += 1
             current_h = queens.heuristic()
-            neighbors, conflicts = queens.neighbors()
+            costs = queens.neighbors()
 
             # Find the neighbor with the smallest amount of conflicts (h) 
-            min_idx = random_minimum_neighbor(conflicts)
-            next_state = queens.coords_to_board(neighbors[min_idx])
-            next_state_h = conflicts[min_idx]
+            row, col = random_minimum_neighbor(costs, queens.rng)
+            next_state_h = current_h + int(costs[row, col])
 
             # Increase or reset side was moves base on equality
             if next_state_h == current_h:
@@ -93,27 +174,31 @@ class HillClimbing(object):
             elif next_state_h < current_h:
                 side_counter = 0
 
-            queens.board = next_state
-            queens.print_board()
-            print("conflicts: {}".format(next_state_h))
-            print("step: {}".format(steps))
-            print("sideways move: {}".format(side_counter))
+            queens.move(row, col)
+            if verbose:
+                queens.print_board()
+                print("conflicts: {}".format(next_state_h))
+                print("step: {}".format(steps))
+                print("sideways move: {}".format(side_counter))
         
             # Success check
             if next_state_h == 0:
-                print("SUCCESS!")
+                if verbose:
+                    print("SUCCESS!")
                 return True, steps
             # Failure check
             if next_state_h > current_h :
-                print("FAILED!")
+                if verbose:
+                    print("FAILED!")
                 return False, steps
             # Sideways move check
             if side_counter >= threshold:
-                print("FAILED!")
+                if verbose:
+                    print("FAILED!")
                 return False, steps
 
     @staticmethod
-    def random_restarts(queens, threshold=100):
+    def random_restarts(queens, threshold=100, verbose=True):
         """ Random restart hill climbing algorithm that restarts at random 
             initializes when no solution could previously be found. By default this 
             algorithm uses sideways moves but can be disabled by setting threshold to 
@@ -123,6 +208,8 @@ class HillClimbing(object):
                 queens (Queens): Queens object for N-queens problem.
 
                 threshold (int): Number of sideways steps allowed.
+
+                verbose (bool): If true every board and its stats are printed.
             
             Returns:
                 True or False if a solution was found or not, the number of 
@@ -131,12 +218,290 @@ class HillClimbing(object):
         restarts = 0
         
         while True:
-            successful, steps = HillClimbing.sideways_moves(queens, threshold)
+            successful, steps = HillClimbing.sideways_moves(
+                queens, threshold, verbose=verbose)
             if successful:
-                print("total restarts: {}".format(restarts))
+                if verbose:
+                    print("total restarts: {}".format(restarts))
                 return successful, steps, restarts
             else:
-                restart_string = "Restart {}".format(restarts)
-                print("{:-^50s}".format(restart_string))
+                if verbose:
+                    restart_string = "Restart {}".format(restarts)
+                    print("{:-^50s}".format(restart_string))
                 queens.populate_board(seed=None)
-                restarts += 1
\ No newline at end of file
+                restarts += 1
+
+    @staticmethod
+    def first_choice(queens, threshold=100, max_tries=None, verbose=True):
+        """ First-choice hill climbing that takes the first random neighbor that
+            improves, or ties while fewer than threshold sideways moves in a row
+            have been taken. Neighbors are drawn lazily from 
+            Queens.random_moves() and scored in O(1) with Queens.move_cost(), 
+            so a step usually only looks at a handful of them instead of all 
+            n * (n - 1). Terminates once every neighbor of a board was rejected,
+            or max_tries of them.
+
+            Args:
+                queens (Queens): Queens object for N-queens problem.
+
+                threshold (int): Number of sideways steps allowed.
+
+                max_tries (int): Neighbors tried per step before giving up, None
+                    tries all of them. Proving a local minimum takes n * (n - 1)
+                    tries, so set it for large n.
+
+                verbose (bool): If true every board and its stats are printed.
+            
+            Returns:
+                True or False if a solution was found or not and the number of 
+                steps it took.
+        """
+        side_counter = 0
+        steps = 0
+        if verbose:
+            queens.print_board()
+            print("conflicts: {}".format(queens.heuristic()))
+
+        while queens.conflicts > 0:
+            moves = itertools.islice(queens.random_moves(), max_tries)
+            for row, col in moves:
+                cost = queens.move_cost(row, col)
+                if cost < 0 or (cost == 0 and side_counter < threshold):
+                    break
+            else:
+                if verbose:
+                    print("FAILED!")
+                return False, steps
+
+            steps += 1
+            side_counter = side_counter + 1 if cost == 0 else 0
+            queens.move(row, col)
+            if verbose:
+                queens.print_board()
+                print("conflicts: {}".format(queens.conflicts))
+                print("step: {}".format(steps))
+                print("sideways move: {}".format(side_counter))
+
+        if verbose:
+            print("SUCCESS!")
+        return True, steps
+
+class MinConflicts(object):
+
+    @staticmethod
+    def solve(queens, max_steps=100000, walk=0.02, samples=32, verbose=True):
+        """ Min-conflicts local search for very large N.
+
+            Every step takes a random conflicted queen and moves it to the 
+            column of its row with the fewest conflicts (ties broken at random),
+            or with probability walk to a random column to escape plateaus. 
+            Since a conflict free column is always among the least conflicted,
+            up to samples random columns are first checked in O(1) each through
+            the Queens counters. Only if none of them is free the conflicts of
+            every column are computed in one O(n) vectorized pass. Moves update
+            the counters in O(1), so memory stays proportional to n. Start from
+            Queens.populate_greedy() so only a handful of queens need fixing.
+
+            Args:
+                queens (Queens): Queens object for N-queens problem.
+
+                max_steps (int): Number of moves before giving up.
+
+                walk (float): Probability of a random walk move.
+
+                samples (int): Random columns checked for a conflict free one
+                    before scanning the whole row.
+
+                verbose (bool): If true the conflicts after every step are printed.
+            
+            Returns:
+                True or False if a solution was found or not and the number of 
+                steps it took.
+        """
+        rng = queens.rng
+        conflicted = []
+        steps = 0
+        if verbose:
+            print("conflicts: {}".format(queens.heuristic()))
+
+        while queens.conflicts > 0 and steps < max_steps:
+            # Conflicted rows are listed in random order and only refreshed
+            # once used up, rows fixed in the meantime are skipped
+            if not conflicted:
+                conflicted = rng.permutation(queens.conflicted_rows()).tolist()
+            row = conflicted.pop()
+            if queens.row_conflicts(row) == 0:
+                continue
+
+            steps += 1
+            if rng.random() < walk:
+                col = int(rng.integers(queens.n))
+            else:
+                for col in rng.integers(queens.n, size=samples).tolist():
+                    if queens.square_conflicts(row, col) == 0:
+                        break
+                else:
+                    col = random_minimum_neighbor(queens.row_costs(row), rng)
+            queens.move(row, col)
+            if verbose:
+                print("step: {} conflicts: {}".format(steps, queens.conflicts))
+
+        if verbose:
+            print("SUCCESS!" if queens.conflicts == 0 else "FAILED!")
+        return queens.conflicts == 0, steps
+
+class SimulatedAnnealing(object):
+
+    @staticmethod
+    def solve(queens, max_tries=1000000, t0=0.3, schedule='exponential',
+              alpha=None, t_min=1e-3, block=4096, verbose=True):
+        """ Simulated annealing over random moves of conflicted queens.
+
+            Every try draws a random conflicted queen and a random new column
+            for it. The change in conflicts is read from the Queens counters in 
+            O(1) and the move is taken if it does not add conflicts, or 
+            otherwise with probability exp(-delta / T) where T follows the 
+            cooling schedule (see temperature()). The conflicted rows are only
+            listed again (in O(n)) after a move is taken, rejected moves leave
+            them as they are. Random numbers are drawn block at a time.
+
+            Args:
+                queens (Queens): Queens object for N-queens problem.
+
+                max_tries (int): Number of moves tried before giving up.
+
+                t0, schedule, t_min: See temperature().
+
+                alpha (float): Cooling rate of the exponential schedule, if None
+                    it is chosen so T reaches t_min after max_tries tries.
+
+                block (int): Number of random moves drawn at once.
+
+                verbose (bool): If true the conflicts after every taken move
+                    are printed.
+            
+            Returns:
+                True or False if a solution was found or not and the number of 
+                steps (moves taken) it took.
+        """
+        rng, n = queens.rng, queens.n
+        if alpha is None:
+            alpha = (t_min / t0) ** (1.0 / max_tries)
+        conflicted = []
+        tries, steps = 0, 0
+        if verbose:
+            print("conflicts: {}".format(queens.heuristic()))
+
+        while queens.conflicts > 0 and tries < max_tries:
+            picks = rng.random(block).tolist()
+            shifts = rng.integers(n - 1, size=block).tolist()
+            draws = rng.random(block).tolist()
+
+            for pick, shift, draw in zip(picks, shifts, draws):
+                if not conflicted:
+                    conflicted = queens.conflicted_rows().tolist()
+                row = conflicted[int(pick * len(conflicted))]
+
+                tries += 1
+                # Any column but the current one
+                old = int(queens.cols[row])
+                col = shift + 1 if shift >= old else shift
+                delta = queens.move_cost(row, col)
+                if delta > 0:
+                    t = temperature(schedule, t0, tries, alpha=alpha,
+                                    max_steps=max_tries, t_min=t_min)
+                    if draw >= math.exp(-delta / t):
+                        if tries >= max_tries:
+                            break
+                        continue
+                steps += 1
+                queens.move(row, col)
+                conflicted = [] # the move changes which queens are attacked
+                if verbose:
+                    print("step: {} conflicts: {}".format(steps, queens.conflicts))
+                if queens.conflicts == 0 or tries >= max_tries:
+                    break
+
+        if verbose:
+            print("tries: {}".format(tries))
+            print("SUCCESS!" if queens.conflicts == 0 else "FAILED!")
+        return queens.conflicts == 0, steps
+
+class TabuSearch(object):
+
+    @staticmethod
+    def solve(queens, max_steps=100000, tenure=10, candidates=8, verbose=True):
+        """ Tabu search over the moves of conflicted queens.
+
+            Every step takes a random conflicted queen and moves it to the best
+            of the candidates least conflicted columns of its row whose board is
+            not tabu, even if that adds conflicts. Boards are hashed with
+            square_keys() and the hashes of the last tenure boards are kept in a
+            set so checking a move is O(1). A tabu move is still taken if it
+            gives fewer conflicts than the best board seen so far (aspiration).
+
+            Args:
+                queens (Queens): Queens object for N-queens problem.
+
+                max_steps (int): Number of moves before giving up.
+
+                tenure (int): Number of recent boards that are tabu.
+
+                candidates (int): Least conflicted columns checked per step.
+
+                verbose (bool): If true the conflicts after every step are printed.
+            
+            Returns:
+                True or False if a solution was found or not and the number of 
+                steps it took.
+        """
+        rng, n = queens.rng, queens.n
+        board_hash = square_keys(np.arange(n), queens.cols, n).sum()
+        tabu = collections.deque([int(board_hash)])
+        tabu_set = set(tabu)
+        best = queens.conflicts
+        conflicted = []
+        steps = 0
+        if verbose:
+            print("conflicts: {}".format(queens.heuristic()))
+
+        while queens.conflicts > 0 and steps < max_steps:
+            # Conflicted rows are picked like MinConflicts.solve()
+            if not conflicted:
+                conflicted = rng.permutation(queens.conflicted_rows()).tolist()
+            row = conflicted.pop()
+            if queens.row_conflicts(row) == 0:
+                continue
+
+            steps += 1
+            old = int(queens.cols[row])
+            costs = queens.row_costs(row)
+            costs[old] = np.iinfo(costs.dtype).max
+            k = min(candidates, n - 1)
+            cols = np.argpartition(costs, k - 1)[:k]
+            # Cheapest first, ties in random order
+            cols = cols[np.lexsort((rng.random(k), costs[cols]))]
+            hashes = (board_hash - square_keys([row], [old], n) + 
+                      square_keys(np.full(k, row), cols, n))
+
+            for col, cost, new_hash in zip(
+                    cols.tolist(), costs[cols].tolist(), hashes.tolist()):
+                if new_hash not in tabu_set or queens.conflicts + cost < best:
+                    break
+            else:
+                continue
+
+            queens.move(row, col)
+            board_hash = np.uint64(new_hash)
+            best = min(best, queens.conflicts)
+            if new_hash not in tabu_set:
+                tabu.append(new_hash)
+                tabu_set.add(new_hash)
+                if len(tabu) > tenure:
+                    tabu_set.discard(tabu.popleft())
+            if verbose:
+                print("step: {} conflicts: {}".format(steps, queens.conflicts))
+
+        if verbose:
+            print("SUCCESS!" if queens.conflicts == 0 else "FAILED!")
+        return queens.conflicts == 0, steps
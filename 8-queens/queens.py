@@ -20,6 +20,21 @@ def boarder(text):
 
     return '\n'.join(wrapper)
 
+def line_conflicts(counts):
+    """ Counts the conflicts among queens sharing lines.
+
+        Every pair of queens on the same line attack each other, so a line 
+        holding k queens adds k choose 2 conflicts.
+
+        Args:
+            counts (ndarray): Number of queens on each line.
+
+        Returns:
+            Total number of conflicts.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    return int((counts * (counts - 1) // 2).sum())
+
 class Queens(object):
     """ Queens is in charge of the N-queens problem which means maintaining the 
         board, generating neighbors and calculating the number of conflicts.
@@ -27,25 +42,221 @@ class Queens(object):
         Attributes:
             n (int): Number of queens which determines size of the board.
 
-            board (ndarray): Internal state of the current board, which is 
-                typically changed by forces outside the class.
+            cols (ndarray): Internal state of the current board, the column of
+                the queen of every row. Use move() to change it, or call 
+                reset_counters() after setting it directly. The dense (n, n)
+                board is only built by to_board() for printing.
+
+            col_counts (ndarray): Number of queens in each column.
+
+            diag_counts (ndarray): Number of queens on each diagonal, indexed by
+                row - col + n - 1.
+
+            anti_counts (ndarray): Number of queens on each anti-diagonal, 
+                indexed by row + col.
+
+            conflicts (int): Total number of conflicts on the current board.
+
+            rng (Generator): Random generator used to populate the board and by
+                the hill climbing algorithms.
     """
-    def __init__(self, n):
+    def __init__(self, n, rng=None):
         self.n = n
-        self.board = None # internal state of the current board
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.cols = None # internal state of the current board
+        self.col_counts = None
+        self.diag_counts = None
+        self.anti_counts = None
+        self.conflicts = 0
     
     def populate_board(self, seed=1):
-        """ Populates a [n, n] board given a random seed.
+        """ Populates the board with one queen per row given a random seed.
         
             Args:
-                seed (int): Seed for randomization.
+                seed (int): Seed for randomization, which replaces the generator
+                    rng. If None the current generator keeps being used.
         """
-        self.board = np.zeros([self.n, self.n], dtype=np.uint8)
-        
-        np.random.seed(seed)
-        for row in range(self.n):
-            col = np.random.randint(self.n)
-            self.board[row, col] = 1
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.cols = self.rng.integers(self.n, size=self.n)
+        self.reset_counters()
+
+    def populate_greedy(self, tries=64, block=4096):
+        """ Populates the board avoiding conflicts where possible.
+
+            Every queen takes a column no other queen uses yet, drawn at random
+            from a queue of unused columns, and is only placed if its diagonals
+            are free too. Rows are placed block rows at a time with array
+            operations: rows whose candidate has a conflict (with the queens
+            placed so far or another row of the same round) put it back in the
+            queue and draw again, up to tries times before taking any column.
+            This leaves only a handful of conflicts even for very large n.
+
+            Args:
+                tries (int): Candidate columns drawn per row before accepting 
+                    one with diagonal conflicts.
+
+                block (int): Number of rows placed at a time.
+        """
+        n = self.n
+        queue = self.rng.permutation(n) # circular queue of unused columns
+        head, size = 0, n
+        diags = np.zeros(2 * n - 1, dtype=bool)
+        antis = np.zeros(2 * n - 1, dtype=bool)
+        self.cols = np.empty(n, dtype=np.int64)
+
+        for start in range(0, n, block):
+            pending = np.arange(start, min(start + block, n))
+            for attempt in range(tries + 1):
+                k = len(pending)
+                cols = queue[(head + np.arange(k)) % n]
+                head = (head + k) % n
+                diag, anti = pending - cols + n - 1, pending + cols
+                if attempt < tries:
+                    # Free diagonals, keeping one row per diagonal this round
+                    free = np.flatnonzero(~diags[diag] & ~antis[anti])
+                    first_diag = np.zeros(len(free), dtype=bool)
+                    first_diag[np.unique(diag[free], return_index=True)[1]] = True
+                    first_anti = np.zeros(len(free), dtype=bool)
+                    first_anti[np.unique(anti[free], return_index=True)[1]] = True
+                    placed = np.zeros(k, dtype=bool)
+                    placed[free[first_diag & first_anti]] = True
+                else:
+                    placed = np.ones(k, dtype=bool)
+
+                self.cols[pending[placed]] = cols[placed]
+                diags[diag[placed]] = True
+                antis[anti[placed]] = True
+
+                # Rejected columns go back to the tail of the queue reshuffled
+                rejected = self.rng.permutation(cols[~placed])
+                tail = head + size - k
+                queue[(tail + np.arange(len(rejected))) % n] = rejected
+                size -= int(placed.sum())
+                pending = pending[~placed]
+                if not len(pending):
+                    break
+
+        self.reset_counters()
+
+    def reset_counters(self):
+        """ Recomputes the line occupancy counters and conflicts from the board.
+
+            Every row holds exactly one queen, so rows never conflict and only 
+            columns and diagonals are counted.
+        """
+        rows, cols = np.arange(self.n), self.cols
+        lines = 2 * self.n - 1
+        self.col_counts = np.bincount(cols, minlength=self.n)
+        self.diag_counts = np.bincount(rows - cols + self.n - 1, minlength=lines)
+        self.anti_counts = np.bincount(rows + cols, minlength=lines)
+        self.conflicts = sum(line_conflicts(counts) for counts in [
+            self.col_counts, self.diag_counts, self.anti_counts])
+
+    def row_conflicts(self, row):
+        """ Number of queens attacking the queen of a row, read from the counters.
+
+            Args:
+                row (int): Row of the queen.
+        """
+        n = self.n
+        col = self.cols[row]
+        return int(self.col_counts[col] + self.diag_counts[row - col + n - 1] + 
+                   self.anti_counts[row + col] - 3)
+
+    def square_conflicts(self, row, col):
+        """ Number of queens that would attack the queen of a row at a column.
+
+            Args:
+                row (int): Row of the queen.
+
+                col (int): Column to check.
+        """
+        n = self.n
+        attacks = (self.col_counts[col] + self.diag_counts[row - col + n - 1] + 
+                   self.anti_counts[row + col])
+        if col == self.cols[row]:
+            attacks -= 3 # the queen's own lines
+
+        return int(attacks)
+
+    def conflicted_rows(self):
+        """ Rows whose queen is attacked by at least one other queen.
+
+            Returns:
+                A ndarray of rows.
+        """
+        n = self.n
+        rows = np.arange(n)
+        return np.flatnonzero(
+            (self.col_counts[self.cols] > 1) | 
+            (self.diag_counts[rows - self.cols + n - 1] > 1) | 
+            (self.anti_counts[rows + self.cols] > 1))
+
+    def row_costs(self, row):
+        """ Change in conflicts for moving the queen of a row to every column.
+
+            Taking the queen off its lines removes one conflict with every other
+            queen on them and placing it on new lines adds one conflict with 
+            every queen already there, so each cost is read from the counters.
+
+            Args:
+                row (int): Row of the queen to move.
+
+            Returns:
+                A ndarray of n costs, 0 for the queen's current column.
+        """
+        n = self.n
+        old = int(self.cols[row])
+        removed = (self.col_counts[old] + self.diag_counts[row - old + n - 1] + 
+                   self.anti_counts[row + old] - 3)
+        # The lines of a row are contiguous slices of the counters
+        costs = (self.col_counts + self.diag_counts[row:row + n][::-1] +
+                 self.anti_counts[row:row + n] - removed)
+        costs[old] = 0
+
+        return costs
+
+    def move_cost(self, row, col):
+        """ Change in conflicts for moving the queen of a row to a column.
+
+            Args:
+                row (int): Row of the queen to move.
+
+                col (int): Column to move the queen to.
+
+            Returns:
+                The number of conflicts added (negative if removed).
+        """
+        n = self.n
+        old = int(self.cols[row])
+        if col == old:
+            return 0
+        removed = (self.col_counts[old] + self.diag_counts[row - old + n - 1] + 
+                   self.anti_counts[row + old] - 3)
+        added = (self.col_counts[col] + self.diag_counts[row - col + n - 1] + 
+                 self.anti_counts[row + col])
+
+        return int(added - removed)
+
+    def move(self, row, col):
+        """ Moves the queen of a row to a column, updating the counters in O(1).
+
+            Args:
+                row (int): Row of the queen to move.
+
+                col (int): Column to move the queen to.
+        """
+        n = self.n
+        old = int(self.cols[row])
+        self.conflicts += self.move_cost(row, col)
+        self.col_counts[old] -= 1
+        self.diag_counts[row - old + n - 1] -= 1
+        self.anti_counts[row + old] -= 1
+        self.col_counts[col] += 1
+        self.diag_counts[row - col + n - 1] += 1
+        self.anti_counts[row + col] += 1
+        self.cols[row] = col
 
     def print_board(self, empty='0', queen='Q'):
         """ Prints the board in a clean but slower fashion.
@@ -56,7 +267,7 @@ class Queens(object):
                 queen (str): Symbol to represent the queens.
         """
         board = ''
-        for row in self.board:
+        for row in self.to_board():
             for i, idx in enumerate(row):
                 if idx == 0:
                    board += '{} '.format(empty)
@@ -64,6 +275,14 @@ class Queens(object):
                     board += '{} '.format(queen)
             board += '\n'
         print(boarder(board))
+
+    def to_board(self):
+        """ Materializes the current board in dense form.
+
+            Returns:
+                A [n, n] uint8 board with a 1 at every queen.
+        """
+        return self.coords_to_board(self.get_coords())
     
     def coords_to_board(self, coords):
         """ Translates all passed queen coordinates to board form. 
@@ -75,8 +294,7 @@ class Queens(object):
                 A [n, n] board with queens at passed coordinates.
         """
         board = np.zeros([self.n, self.n], dtype=np.uint8)
-        for row, col in coords:
-            board[row, col] = 1
+        board[coords[:, 0], coords[:, 1]] = 1
         
         return board
 
@@ -87,8 +305,7 @@ class Queens(object):
                 (n, 2) ndarray of queen coordinates where rows are the 
                 y coordinates columns are the x coordinates. 
         """
-        locs = np.where(self.board == 1)
-        return np.hstack([locs[0].reshape(-1,1), locs[1].reshape(-1,1)])
+        return np.column_stack([np.arange(self.n), self.cols])
 
     def queen_conflicts(self, queen, coords):
         """ Check for a single queen's conflicts given all other queen’s coordinates.
@@ -124,57 +341,74 @@ class Queens(object):
             from the current board.
 
             Args:
-                queen_coords (ndarray): All queen coordinates (row, col)
+                queen_coords (ndarray): All queen coordinates (row, col). If None
+                    the conflicts of the current board are read from the 
+                    counters.
             
             Returns:
                 Total number of conflicts given queen_coords
         """
-        total_conflicts = 0
-
         if queen_coords is None:
-            queen_coords = self.get_coords()
-
-        for i, queen in enumerate(queen_coords):
-            coords = queen_coords[i+1:]
-            
-            queen_conflicts = self.queen_conflicts(queen=queen, coords=coords)
-            
-            total_conflicts += queen_conflicts
+            return self.conflicts
 
-        return total_conflicts
+        rows, cols = queen_coords[:, 0], queen_coords[:, 1]
+        return sum(line_conflicts(np.unique(line, return_counts=True)[1]) 
+                   for line in [rows, cols, rows - cols, rows + cols])
     
     def neighbors(self):
-        """ Generates all neighbors from the current board state.
+        """ Scores every neighbor of the current board state at once.
+
+            A neighbor moves the queen of one row to another column. The costs
+            are computed from the line counters with broadcast operations (see
+            row_costs()) without building any neighbor boards.
 
             Returns:
-                List of neighbor states (in form of queen coordinates) and 
-                a list of their corresponding conflicts.
+                A (n, n) int64 ndarray where entry [row, col] is the change in 
+                conflicts from moving the queen of row to col. The queens' 
+                current columns hold the largest int64 so they are never chosen.
         """
-        neighbors = []
-        conflicts = []
-        queen_coords = self.get_coords()
-
-        # Loop through each queen in the board selecting each queen as the target
-        # queen and determining all the neighboring ROW moves.
-        for i, queen in enumerate(queen_coords):
-            # Remove target queen from set of all queen coordinates
-            coords = np.delete(queen_coords, i, axis=0).reshape(-1,2)
-
-            # Determine all possible new row moves for target queen
-            cols = np.arange(self.n)
-            cols = np.delete(cols, queen[1]).reshape(-1, 1)
+        n = self.n
+        rows = np.arange(n)
+        removed = (self.col_counts[self.cols] + 
+                   self.diag_counts[rows - self.cols + n - 1] + 
+                   self.anti_counts[rows + self.cols] - 3)
+        cols = np.arange(n)
+        costs = (self.col_counts[None, :] + 
+                 self.diag_counts[rows[:, None] - cols[None, :] + n - 1] + 
+                 self.anti_counts[rows[:, None] + cols[None, :]] - 
+                 removed[:, None])
+        costs = costs.astype(np.int64)
+        costs[rows, self.cols] = np.iinfo(np.int64).max
+
+        return costs
+
+    def random_moves(self, block=256):
+        """ Lazily yields every neighbor move of the current board in random order.
+
+            The n * (n - 1) moves are numbered and shuffled with a sparse 
+            Fisher-Yates shuffle which only stores the swapped positions, so 
+            each move costs O(1) and nothing is built up front. A move is turned
+            into a column when it is yielded, skipping the queen's current 
+            column, so the generator should be dropped after moving a queen.
 
-            # Create new coordinates for all possible moves for target queen
-            neighbor_coords = np.hstack([np.full(cols.shape, queen[0]), cols])
-
-            # Calculate all conflicts without target queen yet
-            base_conflicts = self.heuristic(queen_coords=coords)
-
-            # Calculate all conflicts moving target queen creates
-            for new_queen in neighbor_coords:
-                new_conflicts = self.queen_conflicts(queen=new_queen, coords=coords)
-                total_conflicts = new_conflicts + base_conflicts
-                neighbors.append(np.vstack([new_queen, coords]))
-                conflicts.append(total_conflicts)
+            Args:
+                block (int): Number of random numbers drawn at once.
 
-        return neighbors, conflicts
+            Yields:
+                (row, col) moves, each neighbor exactly once.
+        """
+        n = self.n
+        total = n * (n - 1)
+        swapped = {}
+        i = 0
+        while i < total:
+            for draw in self.rng.random(min(block, total - i)).tolist():
+                j = i + int(draw * (total - i))
+                move = swapped.get(j, j)
+                swapped[j] = swapped.get(i, i)
+                i += 1
+
+                row, col = divmod(move, n - 1)
+                if col >= self.cols[row]:
+                    col += 1
+                yield row, col
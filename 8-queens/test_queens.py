@@ -0,0 +1,56 @@
+import numpy as np
+
+from queens import Queens
+
+def random_boards(n, seeds=range(5), moves=20):
+    """ Yields boards with counters updated through a series of random moves. """
+    for seed in seeds:
+        queens = Queens(n=n)
+        queens.populate_board(seed=seed)
+        for _ in range(moves):
+            queens.move(int(queens.rng.integers(n)), int(queens.rng.integers(n)))
+        yield queens
+
+def moved_conflicts(queens, row, col):
+    """ Pairwise conflicts of the board with the queen of row moved to col. """
+    coords = queens.get_coords()
+    coords[row, 1] = col
+    return queens.heuristic(coords)
+
+def test_counters_match_pairwise_conflicts():
+    for n in [1, 4, 8, 13]:
+        for queens in random_boards(n):
+            assert queens.heuristic() == queens.heuristic(queens.get_coords())
+
+            counters = [queens.col_counts, queens.diag_counts, queens.anti_counts]
+            counters = [counts.copy() for counts in counters]
+            queens.reset_counters()
+            for counts, fresh in zip(counters, [
+                    queens.col_counts, queens.diag_counts, queens.anti_counts]):
+                assert np.array_equal(counts, fresh)
+
+def test_move_costs_match_pairwise_conflicts():
+    for n in [4, 8, 13]:
+        for queens in random_boards(n):
+            current = queens.heuristic(queens.get_coords())
+            neighbors = queens.neighbors()
+            for row in range(n):
+                costs = queens.row_costs(row)
+                for col in range(n):
+                    if col == queens.cols[row]:
+                        assert costs[col] == 0
+                        assert queens.move_cost(row, col) == 0
+                        assert neighbors[row, col] == np.iinfo(np.int64).max
+                        continue
+                    delta = moved_conflicts(queens, row, col) - current
+                    assert costs[col] == delta
+                    assert queens.move_cost(row, col) == delta
+                    assert neighbors[row, col] == delta
+
+def test_random_moves_yield_every_neighbor_once():
+    for n in [2, 5, 8, 13]:
+        for queens in random_boards(n):
+            moves = list(queens.random_moves(block=7))
+            assert len(moves) == n * (n - 1)
+            assert len(set(moves)) == n * (n - 1)
+            assert all(col != queens.cols[row] for row, col in moves)
@@ -1,10 +1,18 @@
 import yaml
 import os
+import sys
 from pdb import set_trace
 
 import numpy as np
 from scipy.spatial import distance
-from a_star import AStar
+from a_star import get_engine
+from batch import run_batch
+from benchmark import run_benchmark
+from distance_table import DistanceTable, UNREACHABLE
+from heuristics import get_heuristic
+from metrics import print_metrics
+from regression import run_regression
+from solvability import duplicate_check, solvable
 
 def load_config(dir, config='config.yml'):
     """ Loads a yaml config file
@@ -27,121 +35,19 @@ def load_config(dir, config='config.yml'):
 
     return params
 
-def duplicate_check(a):
-    """ Check for duplicate values in a ndarray 
-    
-        Args:
-            a (ndarray): Array to be checked for duplicate values.
-    """
-    if len(np.unique(a.flatten())) != len(a.flatten()):
-        raise Exception("Duplicate numbers detected! Check initial and goal states!") 
-
-def solvable(state, goal):
-    """ Determine if any 8-puzzle game is solvable.
-    
-        In order for this check to work with any goal I map all goals to the base 
-        number system. Once the mapping in place I check the number of inversions
-        (total amount of numbers that are out of order). If the inversions are 
-        even then the problem is solvable otherwise the problem is not solvable.
-
-        Example:
-            base = [1,2,3,4,5,6,7,8]
-            goal = [8,7,6,5,4,3,2,1]
-            mapped = {8: 1, 7: 2, 6: 3, 5: 4, 4: 5, 3: 6, 2: 7, 1: 8}
-
-        Args:
-            state (ndarray): Initial state to test.
-
-            goal (ndarray): Goal state, i.e. desired number system.
-        
-        Returns:
-            Returns true the the number of inversions is even (solvable) and
-            false if the number of inversions is odd (not solvable).
-    """
-    base = [1,2,3,4,5,6,7,8] # base number system to map to
-    invs = 0 # Total number of inversions  
-
-    # Remove blanks (i.e. 0's) from the state and flaten to a vector
-    state = state[state != 0]
-    state = state.ravel() 
-
-    # Remove blanks (i.e. 0's) from the goal
-    goal = goal[goal != 0] 
-
-    # Map goal number system to base number system
-    mapped = {g: b for g, b in zip(goal, base)} 
-
-    # Calculate inversions 
-    print("Key: {}".format(goal))
-    for ii, i  in enumerate(state):
-        i_invs = 0
-        print("Checking {} against {}...".format(i, state[ii+1:]))
-        for j in state[ii+1:]:
-            if mapped[i]>mapped[j]: 
-                i_invs += 1
-        invs += i_invs
-        print("{} has {} inversions ".format(i, invs))
-    print("Total inversions: {}".format(invs))
-
-    return (invs%2 == 0)
-
-def misplaced(state, goal):
-    """ Calculates the total number of numbers out of place.
-
-        Finds the total number of mismatches between the state and goal.
+def solve_single(params):
+    """ Solves the single initial and goal state pair given in the config.
 
         Args:
-            state (ndarray): Current state
-
-            goal (ndarray): Goal state
-
-        Returns:
-            An interger valued heuristic representing the number of out of place
-            numbers (tiles) with respect to the goal state. 
+            params (dict): The `a_star` section of the config.
     """
-
-    return  np.count_nonzero(state-goal)
-
-def manhattan(state, goal):
-    """ Calculates the manhattan distance given two states.
-
-        Finds the coordinates of all numbers (tiles) in the state and goal. The 
-        absolute difference between the state's and goal's corresponding numbers
-        is then computed and summed.
-
-        Args:
-            state (ndarray): Current state
-
-            goal (ndarray): Goal state
-
-        Returns:
-            An interger valued heuristic representing the sum of all the numbers
-            distances (city block distance) from their goal position.
-    """
-    distance = 0
-
-    for i in range(1, len(state.ravel())):
-        state_coords = np.hstack(np.where(state == i))
-        goal_coords = np.hstack(np.where(goal == i))
-
-        distance += np.abs(state_coords - goal_coords).sum() 
-
-    return distance
-
-if __name__ == "__main__":
-    # Load config parameters
-    working_dir = os.getcwd()
-    config = load_config(dir=working_dir, config='config.yml')
-    init_state = np.array(config['a_star']['init_state'])
-    goal_state = np.array(config['a_star']['goal_state'])
+    init_state = np.array(params['init_state'])
+    goal_state = np.array(params['goal_state'])
     
     # Determine which heuristic to use
-    if config['a_star']['heuristic'] == "manhattan":
-        heuristic = manhattan
-    elif config['a_star']['heuristic'] == "misplaced":
-        heuristic = misplaced
-    else:
-        raise ValueError("Heuristic name invalid!")
+    heuristic_name = params['heuristic']
+    heuristic_kwargs = params.get(heuristic_name) or {}
+    heuristic = get_heuristic(heuristic_name, goal_state, **heuristic_kwargs)
 
     # Print initial and goal state
     print("Initial state:\n{}".format(init_state))
@@ -151,7 +57,7 @@ if __name__ == "__main__":
     print("="*50)
 
     # Test if A* problem is solvable
-    can_solve = solvable(init_state, goal_state)
+    can_solve = solvable(init_state, goal_state, verbose=params.get('verbose', False))
     print("="*50)
     if can_solve:
         print("PUZZLE IS SOLVABLE!")
@@ -163,7 +69,58 @@ if __name__ == "__main__":
             "This will take a long time and is not advised...")
         set_trace()
 
-    # Init and run A* solver
+    # Init and run A* solver, reporting metrics every metrics_interval expansions
     print("="*50)
-    a_star =  AStar(init_state=init_state, goal_state=goal_state)
-    a_star.solve(heuristic=heuristic)
+    engine = get_engine(params['engine'])
+    interval = params.get('metrics_interval')
+    a_star =  engine(
+        init_state=init_state, goal_state=goal_state,
+        packed=params['representation'] == "packed",
+        callback=print_metrics if interval else None, 
+        interval=interval or 10000)
+    result = a_star.search(heuristic=heuristic, **(params.get('search') or {}))
+    if result.solved:
+        a_star.print_solution(a_star.solution)
+        print("Moves: {}".format(''.join(result.moves)))
+        print("Nodes Expanded: {}".format(result.expanded))
+        print("Nodes generated: {}".format(result.generated))
+        if result.bound > 1:
+            print("Cost is at most {:.3f} times optimal".format(result.bound))
+    else:
+        print("No solution found!")
+
+def precompute(params):
+    """ Builds and saves the exact distance table for the configured goal.
+
+        Args:
+            params (dict): The `a_star` section of the config.
+    """
+    goal_state = np.array(params['goal_state'])
+    print("Goal state:\n{}".format(goal_state))
+    duplicate_check(goal_state)
+
+    table = DistanceTable(goal_state, **(params.get('table') or {}))
+    distances = np.asarray(table.table)
+    distances = distances[distances != UNREACHABLE]
+    print("Reachable states: {}".format(len(distances)))
+    print("Max distance: {}".format(distances.max()))
+
+if __name__ == "__main__":
+    # Load config parameters
+    working_dir = os.getcwd()
+    config = load_config(dir=working_dir, config='config.yml')
+
+    # Select mode to run based on config file
+    if config['mode'] == "solve":
+        solve_single(config['a_star'])
+    elif config['mode'] == "precompute":
+        precompute(config['a_star'])
+    elif config['mode'] == "batch":
+        run_batch(params=config['a_star'], **config['batch'])
+    elif config['mode'] == "benchmark":
+        run_benchmark(params=config['a_star'], **config['benchmark'])
+    elif config['mode'] == "regression":
+        if run_regression(params=config['a_star'], **config['regression']):
+            sys.exit(1)
+    else:
+        raise ValueError("Invalid mode given!")
@@ -1,13 +1,24 @@
+import os
+import time
+import heapq
+import shutil
+import tempfile
+import itertools
 from queue import PriorityQueue
 from pdb import set_trace
 
 import numpy as np
 
+from distance_table import DistanceTable, UNREACHABLE
+from frontier import SpillingDict, SpillingFrontier
+from lookup_tables import move_table
+from metrics import SearchMetrics, TimedHeuristic
+
 class PuzzleNode(object):
-    """ Represents a state/node in the 8-puzzle problem.
+    """ Represents a state/node in the N x N sliding puzzle problem.
 
         Attributes:
-            state (ndarray): Current state of the 8-puzzle board.
+            state (ndarray): Current state of the puzzle board.
 
             parent (PuzzleNode): Parent of the current state.
 
@@ -17,6 +28,8 @@ class PuzzleNode(object):
 
             f (int): F-score of the current state.
     """
+    __slots__ = ('state', 'parent', 'g', 'h', 'f')
+
     def __init__(self, state, parent):
         self.state = state
         self.parent = parent
@@ -32,6 +45,27 @@ class PuzzleNode(object):
         """
         return (self.state == other).all()
 
+    def key(self):
+        """ Canonical hashable key for the current state.
+
+            Returns:
+                The raw bytes of the state which can be used for O(1) set and
+                dictionary lookups.
+        """
+        return self.state.tobytes()
+
+    def last_move(self):
+        """ Describes the move that created the current state from its parent.
+
+            Returns:
+                The tile that moved, the flat index it moved from (the new 
+                blank) and the flat index it moved to (the old blank).
+        """
+        src = int(np.flatnonzero(self.state == 0)[0])
+        dst = int(np.flatnonzero(self.parent.state == 0)[0])
+
+        return int(self.state.flat[dst]), src, dst
+
     def move(self, row_empty, col_empty, row_new, col_new):
         """ Executes a desired move on the current state.
 
@@ -54,46 +88,260 @@ class PuzzleNode(object):
 
         return child_state
     
-    def generate_children(self):
-        """ Generates all the possible children for the current state. 
+    def children_states(self):
+        """ Generates the states of all the possible children as one array.
 
-            This is down by considering all the valid moves that are avaliable 
-            to the current state. When a move is executed the move() method is 
-            called to generate a new child state representation.
+            This is down by considering all the valid moves (left, right, up and
+            down) that are avaliable to the current state and applying all of 
+            them at once to a stacked copy of the current state.
 
             Returns:
-                A list of children represented as ndarrays.
+                A (children, rows, cols) ndarray of child states.
         """
-        children = []
+        rows, cols = self.state.shape
         # Corrodents of the empty block corresponding to row x col
-        empty_coord = np.hstack(np.where(self.state == 0))
-
-        # Attempt to move left
-        left = empty_coord - [0, 1] 
-        if left[1] >= 0:
-            #print("move left")
-            child_state = self.move(*empty_coord, *left)
-            children.append(PuzzleNode(state=child_state, parent=self))
-        # Attempt to move right
-        right = empty_coord + [0, 1] 
-        if right[1] < self.state.shape[1]:
-            #print("move right")
-            child_state = self.move(*empty_coord, *right)
-            children.append(PuzzleNode(state=child_state, parent=self))
-        ## Attempt to move right
-        up = empty_coord - [1, 0] 
-        if up[0] >= 0:
-            #print("move up")
-            child_state = self.move(*empty_coord, *up)
-            children.append(PuzzleNode(state=child_state, parent=self))
-        # Attempt to move down
-        down = empty_coord + [1, 0] 
-        if down[0] < self.state.shape[0]:
-            #print("move down")
-            child_state = self.move(*empty_coord, *down)
-            children.append(PuzzleNode(state=child_state, parent=self))
+        row, col = np.hstack(np.where(self.state == 0))
+
+        targets = []
+        if col - 1 >= 0:
+            targets.append((row, col - 1)) # left
+        if col + 1 < cols:
+            targets.append((row, col + 1)) # right
+        if row - 1 >= 0:
+            targets.append((row - 1, col)) # up
+        if row + 1 < rows:
+            targets.append((row + 1, col)) # down
+        target_rows, target_cols = np.array(targets).T
+
+        idx = np.arange(len(targets))
+        states = np.repeat(self.state[None], len(targets), axis=0)
+        states[idx, row, col] = self.state[target_rows, target_cols]
+        states[idx, target_rows, target_cols] = 0
+
+        return states
+
+    def generate_children(self, states=None):
+        """ Generates all the possible children for the current state. 
+
+            Args:
+                states (ndarray): Stacked child states from children_states().
+                    If None they are generated.
+
+            Returns:
+                A list of children represented as PuzzleNodes whose states are 
+                views of the stacked child states.
+        """
+        if states is None:
+            states = self.children_states()
+
+        return [PuzzleNode(state=state, parent=self) for state in states]
+
+class PackedBoard(object):
+    """ Bit layout and precomputed move tables for packed puzzle states.
+
+        A packed state is a single integer where each cell (in row-major order)
+        occupies `bits` bits, i.e. cell i lives at bit offset i * bits. Boards
+        with up to 16 cells use 4 bits per tile. Since the blank is 0 its bits
+        are always clear, which means a move is just a subtraction and an
+        addition of the sliding tile.
+
+        Attributes:
+            shape (tuple): Number of rows and columns of the board.
+
+            bits (int): Number of bits used to store a single tile.
+
+            mask (int): Bit mask for a single tile.
+
+            shifts (tuple): Bit offset of every cell.
+
+            moves (tuple): For every blank position the positions the blank
+                can move to (left, right, up and down order).
+    """
+    def __init__(self, shape):
+        rows, cols = shape
+        size = rows * cols
+
+        self.shape = (rows, cols)
+        self.bits = max(4, (size - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.shifts = tuple(i * self.bits for i in range(size))
+
+        self.moves = tuple(
+            tuple(pos for pos in row.tolist() if pos >= 0)
+            for row in move_table(self.shape))
+
+    def pack(self, state):
+        """ Packs a board into a single integer.
+
+            Args:
+                state (ndarray): Board to be packed.
+
+            Returns:
+                The packed integer representation and the flat index of the 
+                blank (i.e. 0).
+        """
+        flat = np.asarray(state).ravel()
+        code = 0
+        for shift, tile in zip(self.shifts, flat):
+            code |= int(tile) << shift
+
+        return code, int(np.flatnonzero(flat == 0)[0])
+
+    def unpack(self, code):
+        """ Unpacks an integer back into board form.
+
+            Args:
+                code (int): Packed integer representation of a board.
+
+            Returns:
+                A ndarray of the board.
+        """
+        flat = [(code >> shift) & self.mask for shift in self.shifts]
+
+        return np.array(flat).reshape(self.shape)
+
+class PackedPuzzleNode(object):
+    """ Compact state/node in the N x N sliding puzzle problem.
+
+        Drop-in alternative to PuzzleNode which stores the board as a packed
+        integer and tracks the blank position explicitly. Children are generated
+        with a handful of bit operations using the move tables of PackedBoard.
+
+        Attributes:
+            code (int): Packed integer representation of the board.
+
+            blank (int): Flat index of the blank (i.e. 0).
+
+            board (PackedBoard): Bit layout and move tables shared by all nodes.
+
+            parent (PackedPuzzleNode): Parent of the current state.
+
+            g (int): G-score of the current state.
+
+            h (int): H-score of the current state.
+
+            f (int): F-score of the current state.
+    """
+    __slots__ = ('code', 'blank', 'board', 'parent', 'g', 'h', 'f')
+
+    def __init__(self, code, blank, board, parent):
+        self.code = code
+        self.blank = blank
+        self.board = board
+        self.parent = parent
+        self.g = 0
+        self.h = 0
+        self.f = 0
+
+    @classmethod
+    def from_state(cls, state, board=None):
+        """ Creates a root node from a board in ndarray form.
+
+            Args:
+                state (ndarray): Board to be packed.
+
+                board (PackedBoard): Move tables to use. If None new tables
+                    are built for the shape of the state.
+        """
+        if board is None:
+            board = PackedBoard(np.shape(state))
+        code, blank = board.pack(state)
+
+        return cls(code=code, blank=blank, board=board, parent=None)
+
+    @property
+    def state(self):
+        """ The current board unpacked to a ndarray. """
+        return self.board.unpack(self.code)
+
+    def equals(self, other):
+        """ Checks equality with a board in ndarray form.
         
-        return children
+            Args:
+                other (ndarray): Another ndarray to check equality with.
+        """
+        return self.code == self.board.pack(other)[0]
+
+    def key(self):
+        """ Canonical hashable key for the current state.
+
+            Returns:
+                The packed integer representation of the state.
+        """
+        return self.code
+
+    def last_move(self):
+        """ Describes the move that created the current state from its parent.
+
+            Returns:
+                The tile that moved, the flat index it moved from (the new 
+                blank) and the flat index it moved to (the old blank).
+        """
+        dst = self.parent.blank
+        tile = (self.code >> self.board.shifts[dst]) & self.board.mask
+
+        return tile, self.blank, dst
+
+    def move(self, new_blank):
+        """ Executes a desired move on the current state.
+
+            Args:
+                new_blank (int): The flat index the 0 is moving to.
+
+            Returns:
+                A new state represented by a packed integer.
+        """
+        shifts = self.board.shifts
+        tile = (self.code >> shifts[new_blank]) & self.board.mask
+
+        return self.code - (tile << shifts[new_blank]) + (tile << shifts[self.blank])
+
+    def generate_children(self):
+        """ Generates all the possible children for the current state. 
+
+            Valid moves are read from the precomputed move tables so no bounds
+            checks are needed.
+
+            Returns:
+                A list of children represented as PackedPuzzleNodes.
+        """
+        board = self.board
+        return [
+            PackedPuzzleNode(
+                code=self.move(new_blank), blank=new_blank, board=board, parent=self)
+            for new_blank in board.moves[self.blank]
+        ]
+
+class SearchResult(object):
+    """ Structured outcome of a search returned by AStar.search().
+
+        Attributes:
+            solved (bool): True if a solution was found.
+
+            moves (list): Directions the blank moved in ('L', 'R', 'U', 'D').
+
+            path (list): Boards from the initial state to the goal state.
+
+            cost (int): Number of moves, None if not solved.
+
+            expanded (int): Nodes expanded.
+
+            generated (int): Nodes generated.
+
+            bound (float): Suboptimality bound of the solution.
+
+            metrics (dict): SearchMetrics.snapshot() of the search.
+    """
+    def __init__(self, solved, moves, path, cost, expanded, generated, bound, 
+                 metrics):
+        self.solved = solved
+        self.moves = moves
+        self.path = path
+        self.cost = cost
+        self.expanded = expanded
+        self.generated = generated
+        self.bound = bound
+        self.metrics = metrics
 
 class AStar(object):
     """ A* algorithm for solving graph and pathing problems.
@@ -102,12 +350,111 @@ class AStar(object):
             init (ndarray): Initial state the algorithm will state in.
 
             goal (ndarray): Goal state the algorithm needs to find.
+
+            packed (bool): If true states are stored as PackedPuzzleNodes
+                instead of PuzzleNodes.
+
+            solution (PuzzleNode): Final node of the last solution found.
+
+            expanded (int): Nodes expanded by the last call to solve().
+
+            generated (int): Nodes generated by the last call to solve().
+
+            bound (float): Suboptimality bound of the last solution, i.e. its 
+                cost is at most bound times the optimal cost.
+
+            solutions (list): (cost, bound, seconds) of every improved solution
+                reported by the last anytime search.
+
+            callback (func): Called with the SearchMetrics every interval 
+                expansions and once the search has finished.
+
+            interval (int): Expansions between callback calls.
+
+            metrics (SearchMetrics): Metrics of the last search.
     """ 
-    def __init__(self, init_state, goal_state):
-        self.init = init_state
-        self.goal = goal_state
+    uses_heuristic = True # false for engines that ignore the heuristic given
+
+    def __init__(self, init_state, goal_state, packed=False, callback=None, 
+                 interval=10000):
+        # Keys are the raw bytes of a board, so every board shares one dtype
+        self.init = np.asarray(init_state, dtype=np.int64)
+        self.goal = np.asarray(goal_state, dtype=np.int64)
+        self.packed = packed
+        self.solution = None
+        self.expanded = 0
+        self.generated = 0
+        self.bound = 1.0
+        self.solutions = []
+        self.callback = callback
+        self.interval = interval
+        self.metrics = SearchMetrics()
+
+    def make_node(self, state):
+        """ Creates a root node using the configured state representation.
+
+            Args:
+                state (ndarray): Board the node represents.
+        """
+        if self.packed:
+            return PackedPuzzleNode.from_state(state)
+
+        return PuzzleNode(state=state, parent=None)
+
+    def report(self, final=False, **counters):
+        """ Updates the metrics and passes them to the callback, if any.
+
+            Args:
+                final (bool): True once the search has finished.
+
+                counters: SearchMetrics counters to set, frontier being the
+                    current frontier size.
+        """
+        self.metrics.update(**counters)
+        self.metrics.final = final
+        if self.callback is not None:
+            self.callback(self.metrics)
+
+    def search(self, heuristic, **kwargs):
+        """ Runs solve() silently and collects the outcome.
+
+            Args:
+                heuristic (func): Heuristic passed to solve(). When a callback
+                    is set it is wrapped in a TimedHeuristic so the metrics
+                    include the time spent evaluating it.
+
+                kwargs: Any other solve() arguments.
+
+            Returns:
+                A SearchResult.
+        """
+        self.metrics = SearchMetrics()
+        if self.callback is not None:
+            heuristic = TimedHeuristic(heuristic, self.metrics)
+        solved = self.solve(heuristic, verbose=False, **kwargs)
+        self.report(final=True, expanded=self.expanded, generated=self.generated)
+
+        return self.result(solved)
+
+    def result(self, solved):
+        """ Builds a SearchResult from the last solution.
+
+            Args:
+                solved (bool): Value returned by solve().
+        """
+        path = self.solution_path(self.solution) if solved else []
+        return SearchResult(
+            solved=solved,
+            moves=self.solution_moves(self.solution) if solved else [],
+            path=[node.state for node in path],
+            cost=len(path) - 1 if solved else None,
+            expanded=self.expanded,
+            generated=self.generated,
+            bound=self.bound,
+            metrics=self.metrics.snapshot())
  
-    def solve(self, heuristic):
+    def solve(self, heuristic, verbose=True, weight=1.0, time_budget=None, 
+              weight_step=0.5, max_nodes=None, spill_dir=None):
         """ Attempts to solve problem using the A* algorithm.
 
             Notes:
@@ -115,20 +462,76 @@ class AStar(object):
                 along with the h, g, and f scores for each step. If the problem 
                 is not solvable the program will attempt to iterate over the
                 entire state space.
+
+                With a weight above 1 nodes are ordered by g + weight * h 
+                (weighted A*) which usually finds a solution much sooner, at a
+                cost of at most weight times the optimal cost. If a time_budget
+                is given solve_anytime() is run instead, starting at weight if 
+                it is above 1 and at solve_anytime()'s default weight otherwise.
+                If max_nodes is given solve_bounded() is run instead.
             
             Args:
                 heuristic (func): A heuristic function thats input is the goal state.
+                    If the heuristic provides a batch(states, goal) method (see
+                    heuristics.py) and the nodes are PuzzleNodes all the 
+                    children of an expansion are scored in one call. Otherwise,
+                    if it provides a delta(tile, src, dst) method child h-scores
+                    are updated incrementally from their parent instead of 
+                    being recomputed.
+
+                verbose (bool): If false nothing is printed, the solution and
+                    stats are only stored on the object.
+
+                weight (float): Weight of the h-score.
+
+                time_budget (float): Seconds the anytime search may run for.
+
+                weight_step (float): Amount the anytime search lowers the weight
+                    by after every solution.
+
+                max_nodes (int): Maximum number of frontier and of closed set
+                    entries kept in memory.
+
+                spill_dir (str): Directory used by solve_bounded(). If None a 
+                    temporary directory is used.
 
             Returns:
                 A boolean where a true value corresponds to solving the problem
                 while false corresponds to an unsolvable problem.
         """
-        open_set = [] # frontier
-        closed_set = [] # explored
+        if max_nodes is not None:
+            return self.solve_bounded(
+                heuristic, max_nodes=max_nodes, spill_dir=spill_dir, 
+                weight=weight, verbose=verbose)
+        if time_budget is not None:
+            # A weight of 1 would be a single plain A* pass, never refined
+            options = {'weight': weight} if weight > 1 else {}
+            return self.solve_anytime(
+                heuristic, weight_step=weight_step, time_budget=time_budget,
+                verbose=verbose, **options)
+
+        open_set = [] # frontier (heap of (g + weight * h, tie, node))
+        closed_set = set() # explored state keys
+        best_g = {} # cheapest known g-score for each state key
+        tie = itertools.count() # LIFO tie-breaker for equal f-scores
         generated = 0
+        duplicates = 0
+        peak = 0
+        reporting = self.callback is not None
+
+        def keep(child):
+            # Skip closed states and paths that are not cheaper, before scoring
+            nonlocal generated, duplicates
+            generated += 1
+            child_key = child.key()
+            if child_key in closed_set or child.g >= best_g.get(child_key, float('inf')):
+                duplicates += 1
+                return False
+            return True
 
         # Init state node object
-        current_node = PuzzleNode(state=self.init, parent=None)
+        current_node = self.make_node(self.init)
+        goal_key = self.make_node(self.goal).key()
 
         # Init start nodes scores
         current_node.g = 0
@@ -137,64 +540,730 @@ class AStar(object):
         current_node.parent = None
 
         # Add node to open_set
-        open_set.append(current_node)
+        best_g[current_node.key()] = current_node.g
+        heapq.heappush(open_set, (
+            current_node.g + weight * current_node.h, -next(tie), current_node))
         while open_set:
-            # Sort nodes then remove smallest score node adding it to the closed set
-            print("Openset size: {}".format(len(open_set)), end="\r")
-            open_set.sort(key= lambda x: x.f, reverse=True)
-            current_node = open_set.pop()
-            closed_set.append(current_node)
+            # Pop smallest score node adding it to the closed set
+            if len(open_set) > peak:
+                peak = len(open_set)
+            _, _, current_node = heapq.heappop(open_set)
+            current_key = current_node.key()
+
+            # Lazy deletion: skip entries superseded by a cheaper path
+            if current_key in closed_set or current_node.g > best_g[current_key]:
+                duplicates += 1
+                continue
+            closed_set.add(current_key)
+            if reporting and len(closed_set) % self.interval == 0:
+                self.report(expanded=len(closed_set), generated=generated, 
+                            duplicates=duplicates, frontier=peak)
         
             # Goal check
-            if current_node.equals(self.goal):
-                self.print_solution(current_node) # output solution
-                print("Nodes Expanded: {}".format(len(closed_set)))
-                print("Nodes generated: {}".format(generated))
+            if current_key == goal_key:
+                self.solution = current_node
+                self.bound = max(1.0, weight)
+                self.expanded, self.generated = len(closed_set), generated
+                self.metrics.update(duplicates=duplicates, frontier=peak)
+                if verbose:
+                    self.print_solution(current_node) # output solution
+                    print("Nodes Expanded: {}".format(len(closed_set)))
+                    print("Nodes generated: {}".format(generated))
                 return True
 
-            # Generate current nodes children and loop through them
-            children = current_node.generate_children()
-            generated += len(children)
-            for child in children:
-                if any(child.equals(n.state) for n in closed_set):
-                    continue
-                
-                child.g =  current_node.g + 1
+            # Generate current nodes children and add the new or cheaper ones
+            for child in self.score_children(current_node, heuristic, keep=keep):
+                best_g[child.key()] = child.g
+                heapq.heappush(open_set, (child.g + weight * child.h, -next(tie), child))
+
+        self.solution = None
+        self.expanded, self.generated = len(closed_set), generated
+        self.metrics.update(duplicates=duplicates, frontier=peak)
+        return False
+
+    def score_children(self, node, heuristic, keep=None):
+        """ Generates the children of a node with their scores set.
+
+            Args:
+                node (PuzzleNode): Node to expand.
+
+                heuristic (func): Heuristic used to score the children. If it
+                    provides a batch(states, goal) method and the nodes are 
+                    PuzzleNodes all the children are scored in one call. 
+                    Otherwise, if it provides a delta(tile, src, dst) method 
+                    the h-scores are updated incrementally from the parent.
+
+                keep (func): If given, called with every child once its parent
+                    and g-score are set and children it returns false for are
+                    dropped before their h-score is computed.
+
+            Returns:
+                A list of children with their parent, g, h and f-scores set.
+        """
+        if hasattr(heuristic, 'batch') and not self.packed:
+            states = node.children_states()
+            children = node.generate_children(states)
+            children_h = heuristic.batch(states, self.goal).tolist()
+        else:
+            children = node.generate_children()
+            children_h = None
+
+        scored = []
+        for i, child in enumerate(children):
+            child.parent = node
+            child.g = node.g + 1
+            if keep is not None and not keep(child):
+                continue
+            if children_h is not None:
+                child.h = children_h[i]
+            elif hasattr(heuristic, 'delta'):
+                child.h = node.h + heuristic.delta(*child.last_move())
+            else:
                 child.h = heuristic(child.state, self.goal)
-                child.f = child.g + child.h
-                child.parent = current_node
+            child.f = child.g + child.h
+            scored.append(child)
+
+        return scored
+
+    def solve_anytime(self, heuristic, weight=3.0, weight_step=0.5, 
+                      time_budget=1.0, verbose=True):
+        """ Anytime repairing A* (ARA*) with a time budget.
+
+            Notes:
+                A weighted A* search with a large weight quickly finds a first 
+                solution. The weight is then lowered by weight_step and the 
+                search is repaired rather than restarted: states whose g-score
+                improved after they were expanded are kept aside and put back 
+                on the frontier for the next pass. Every improved solution is
+                reported with its suboptimality bound, computed from the 
+                smallest g + h left on the frontier, until the weight reaches 1 
+                (the solution is optimal) or the time budget runs out.
+
+            Args:
+                heuristic (func): A heuristic function thats input is the goal state.
+
+                weight (float): Initial weight of the h-score.
+
+                weight_step (float): Amount the weight is lowered by after every 
+                    solution.
 
-                # Don't add child if it already exists and is more expensive.
-                if any(child.equals(n.state) and child.g > n.g for n in open_set):
+                time_budget (float): Seconds the search may run for.
+
+                verbose (bool): If false nothing is printed, the solution and
+                    stats are only stored on the object.
+
+            Returns:
+                A boolean where a true value corresponds to finding at least one
+                solution within the time budget.
+        """
+        start = time.monotonic()
+        deadline = start + time_budget
+        tie = itertools.count()
+        self.solution = None
+        self.solutions = []
+        self.bound = float('inf')
+        self.expanded, self.generated = 0, 0
+        duplicates = 0
+        peak = 0
+
+        root = self.make_node(self.init)
+        root.h = heuristic(self.init, self.goal)
+        root.f = root.h
+        goal_key = self.make_node(self.goal).key()
+
+        nodes = {root.key(): root} # best known node of every state
+        open_set = [(weight * root.h, -next(tie), root)]
+        closed_set = set()
+        inconsistent = {} # improved states that were already expanded
+
+        while True:
+            # Improve the path until no frontier node can beat the goal
+            timed_out = False
+            while open_set:
+                goal_node = nodes.get(goal_key)
+                if goal_node is not None and goal_node.g <= open_set[0][0]:
+                    break
+                if time.monotonic() > deadline:
+                    timed_out = True
+                    break
+
+                if len(open_set) > peak:
+                    peak = len(open_set)
+                _, _, node = heapq.heappop(open_set)
+                key = node.key()
+                # Lazy deletion: skip superseded and already expanded entries
+                if nodes[key] is not node or key in closed_set:
+                    duplicates += 1
                     continue
+                closed_set.add(key)
+                self.expanded += 1
 
-                # Add child
-                # assert child.h + 1 >= current_node.h
-                open_set.append(child)
+                children = self.score_children(node, heuristic)
+                self.generated += len(children)
+                for child in children:
+                    child_key = child.key()
+                    best = nodes.get(child_key)
+                    if best is not None and best.g <= child.g:
+                        duplicates += 1
+                        continue
+                    nodes[child_key] = child
+                    if child_key in closed_set:
+                        inconsistent[child_key] = child
+                    else:
+                        heapq.heappush(
+                            open_set, (child.g + weight * child.h, -next(tie), child))
 
-        return False
+            # The whole state space was searched without reaching the goal
+            goal_node = nodes.get(goal_key)
+            if goal_node is None and not timed_out:
+                break
+
+            # Report the solution if it or its bound improved
+            if goal_node is not None:
+                candidates = [n for _, _, n in open_set if nodes[n.key()] is n]
+                candidates += list(inconsistent.values())
+                lower = min([goal_node.g] + [n.g + n.h for n in candidates])
+                bound = goal_node.g / lower if lower else 1.0
+                if not timed_out:
+                    bound = min(bound, weight) # only holds once a pass is done
+                if self.solution is None or goal_node.g < self.solution.g or \
+                        bound < self.bound:
+                    self.solution, self.bound = goal_node, bound
+                    elapsed = time.monotonic() - start
+                    self.solutions.append((goal_node.g, bound, elapsed))
+                    if verbose:
+                        print("Solution cost: {} Weight: {} Bound: {:.3f} Time: {:.3f}".format(
+                            goal_node.g, weight, bound, elapsed))
+
+            if timed_out or weight <= 1.0 or self.bound <= 1.0:
+                break
+
+            # Lower the weight and repair the frontier for the next pass
+            weight = max(1.0, weight - weight_step)
+            frontier = {n.key(): n for _, _, n in open_set if nodes[n.key()] is n}
+            frontier.update(inconsistent)
+            open_set = [(n.g + weight * n.h, -next(tie), n) for n in frontier.values()
+                        if n.key() not in closed_set or n.key() in inconsistent]
+            heapq.heapify(open_set)
+            closed_set = set()
+            inconsistent = {}
+
+        self.metrics.update(duplicates=duplicates, frontier=peak)
+        if self.solution is None:
+            return False
+        if verbose:
+            self.print_solution(self.solution)
+            print("Nodes Expanded: {}".format(self.expanded))
+            print("Nodes generated: {}".format(self.generated))
+        return True
+
+    def solve_bounded(self, heuristic, max_nodes, spill_dir=None, weight=1.0,
+                      verbose=True):
+        """ A* search with a memory cap on the frontier and closed set.
+
+            Notes:
+                States are always stored as packed integers and the frontier 
+                entries only hold the state, its blank, g and h-scores and its
+                parent's state. Once more than max_nodes entries are in the 
+                frontier the ones with the largest f-scores are spilled to disk
+                in per f-score buckets (SpillingFrontier), and once more than
+                max_nodes states are closed they are moved to a SQLite database
+                (SpillingDict). Duplicates are dropped when they are popped 
+                rather than when they are generated, so an unsolvable problem
+                searches the entire state space using disk instead of running 
+                out of memory.
+
+            Args:
+                heuristic (func): A heuristic function thats input is the goal state.
+
+                max_nodes (int): Maximum number of frontier and of closed set
+                    entries kept in memory.
 
-    def print_solution(self, current_node, step=0):
-        """ Prints solution recursively.
+                spill_dir (str): Directory the spilled entries are written under.
+                    Every call spills to its own temporary directory inside it
+                    (the system default if None), which is removed afterwards, so
+                    calls sharing a spill_dir never see each other's entries.
+
+                weight (float): Weight of the h-score (see solve()).
+
+                verbose (bool): If false nothing is printed, the solution and
+                    stats are only stored on the object.
+
+            Returns:
+                A boolean where a true value corresponds to solving the problem
+                while false corresponds to an unsolvable problem.
+        """
+        board = PackedBoard(self.init.shape)
+        moves, shifts, mask = board.moves, board.shifts, board.mask
+        init_code, init_blank = board.pack(self.init)
+        goal_code = board.pack(self.goal)[0]
+        incremental = hasattr(heuristic, 'delta')
+
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+        spill_dir = tempfile.mkdtemp(prefix='spill-', dir=spill_dir)
+        open_set = SpillingFrontier(max_nodes, spill_dir)
+        closed_set = SpillingDict(max_nodes, spill_dir) # state -> parent state
+        self.solution = None
+        self.expanded, self.generated = 0, 0
+        peak = 0
+
+        try:
+            h = heuristic(self.init, self.goal)
+            open_set.push(weight * h, (0, h, init_code, init_blank, -1))
+            while open_set:
+                if len(open_set) > peak:
+                    peak = len(open_set)
+                _, (g, h, code, blank, parent) = open_set.pop()
+                if code in closed_set:
+                    self.metrics.duplicates += 1
+                    continue
+                closed_set[code] = parent
+                self.expanded += 1
+                if self.callback is not None and self.expanded % self.interval == 0:
+                    self.report(expanded=self.expanded, generated=self.generated,
+                                frontier=len(open_set))
+
+                if code == goal_code:
+                    # Walk the parents back to the initial state
+                    path = []
+                    while code != init_code:
+                        path.append(int(np.flatnonzero(board.unpack(code) == 0)[0]))
+                        code = closed_set.get(code)
+                    path.reverse()
+                    self.solution = self.path_to_node(path, heuristic)
+                    self.bound = max(1.0, weight)
+                    if verbose:
+                        self.print_solution(self.solution)
+                        print("Nodes Expanded: {}".format(self.expanded))
+                        print("Nodes generated: {}".format(self.generated))
+                        print("Nodes spilled to disk: {}".format(
+                            open_set.spilled + closed_set.spilled))
+                    return True
+
+                for new_blank in moves[blank]:
+                    self.generated += 1
+                    tile = (code >> shifts[new_blank]) & mask
+                    child = code - (tile << shifts[new_blank]) + (tile << shifts[blank])
+                    if child == parent or child in closed_set:
+                        self.metrics.duplicates += 1
+                        continue
+                    if incremental:
+                        child_h = h + heuristic.delta(tile, new_blank, blank)
+                    else:
+                        child_h = heuristic(board.unpack(child), self.goal)
+                    open_set.push(
+                        g + 1 + weight * child_h, (g + 1, child_h, child, new_blank, code))
+
+            return False
+        finally:
+            self.metrics.update(frontier=peak)
+            closed_set.close()
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+    def solution_path(self, node):
+        """ Lists the nodes that lead from the initial state to a node.
 
             Args:
+                node (PuzzleNode): Final node of a solution.
+
+            Returns:
+                A list of nodes starting at the initial state, built by walking 
+                the parent pointers iteratively so long solutions can't hit the
+                recursion limit.
+        """
+        path = []
+        while node is not None:
+            path.append(node)
+            node = node.parent
+        path.reverse()
+
+        return path
 
-                current_node (ndarray): Current state of the solution
+    def print_solution(self, current_node):
+        """ Prints every step of a solution along with its f, g and h-scores.
 
-                step (int): Counts the total number of steps it takes to reach
-                the initial state from the goal state.
+            Args:
+                current_node (PuzzleNode): Final node of the solution.
             
             Return:
-                The total steps it took to reach the initial state by recursively
-                iterating from the goal state to the initial state.
+                The total steps it took to reach the goal state from the 
+                initial state.
+        """
+        path = self.solution_path(current_node)
+        for step, node in enumerate(path):
+            print("Step {}\n{}".format(step, node.state))
+            print("{} = {} + {}\n".format(node.f, node.g, node.h))
+
+        return len(path) - 1
+
+    def path_to_node(self, path, heuristic):
+        """ Replays a path of blank positions into a chain of PuzzleNodes.
+
+            Args:
+                path (list): Flat indices the blank moved to, in order.
+
+                heuristic (func): Heuristic used to score each step.
+
+            Returns:
+                The PuzzleNode of the final state.
+        """
+        node = PuzzleNode(state=self.init, parent=None)
+        node.h = heuristic(node.state, self.goal)
+        node.f = node.h
+        for new_blank in path:
+            empty_coord = np.hstack(np.where(node.state == 0))
+            new_coord = np.unravel_index(new_blank, node.state.shape)
+            child = PuzzleNode(state=node.move(*empty_coord, *new_coord), parent=node)
+            child.g = node.g + 1
+            child.h = heuristic(child.state, self.goal)
+            child.f = child.g + child.h
+            node = child
+
+        return node
+
+    def solution_moves(self, node):
+        """ Lists the moves of the blank that lead from the initial state to a node.
+
+            Args:
+                node (PuzzleNode): Final node of a solution.
+
+            Returns:
+                A list of moves where each move is one of 'L', 'R', 'U' or 'D'
+                (the direction the blank moved in).
         """
-        if current_node.parent is None:
-            print("Step {}\n{}".format(0, current_node.state))
-            print("{} = {} + {}\n".format(current_node.f, current_node.g, current_node.h))
-            return step
+        cols = self.init.shape[1]
+        names = {-1: 'L', 1: 'R', -cols: 'U', cols: 'D'}
+        blanks = []
+        while node is not None:
+            blanks.append(int(np.flatnonzero(node.state == 0)[0]))
+            node = node.parent
+        blanks.reverse()
+
+        return [names[new - old] for old, new in zip(blanks, blanks[1:])]
+
+class IDAStar(AStar):
+    """ Iterative deepening A* algorithm for solving N x N sliding puzzles.
+
+        Runs a series of depth-first searches bounded by the f-score, raising the
+        bound to the smallest f-score that exceeded it after every iteration.
+        Only the current path is kept in memory so the memory used is linear in 
+        the solution depth, which makes 15 and 24-puzzles feasible.
+
+        Attributes:
+            init (ndarray): Initial state the algorithm will state in.
 
-        total_steps = self.print_solution(current_node.parent, step=step+1)
-        print("Step {}\n{}".format(total_steps - step, current_node.state))
-        print("{} = {} + {}\n".format(current_node.f, current_node.g, current_node.h))
+            goal (ndarray): Goal state the algorithm needs to find.
+    """
+    FOUND = -1 # marker returned once the goal has been reached
+
+    def solve(self, heuristic, verbose=True, **kwargs):
+        """ Attempts to solve problem using the IDA* algorithm.
+
+            Notes:
+                Moves are made and unmade in place on a single flat board and the
+                move that would undo the previous move is pruned. Once a solution
+                is found it will print the required steps along with the h, g, 
+                and f scores for each step. If the problem is not solvable the
+                program will keep iterating with ever increasing bounds.
+
+            Args:
+                heuristic (func): A heuristic function thats input is the goal state.
+                    If the heuristic provides a delta(tile, src, dst) method 
+                    (see heuristics.py) h-scores are updated incrementally.
+
+                verbose (bool): If false nothing is printed, the solution and
+                    stats are only stored on the object.
+
+                kwargs (dict): Search options of AStar.solve() (e.g. weight) 
+                    which do not apply to this engine and are ignored.
+
+            Returns:
+                A boolean where a true value corresponds to solving the problem.
+        """
+        shape = self.init.shape
+        moves = PackedBoard(shape).moves
+        tiles = self.init.ravel().tolist()
+        goal_tiles = self.goal.ravel().tolist()
+        incremental = hasattr(heuristic, 'delta')
+        path = [] # blank positions visited after the initial state
+        stats = {'expanded': 0, 'generated': 0, 'duplicates': 0, 'depth': 0}
+        FOUND = self.FOUND
+
+        def search(blank, prev, g, h, bound):
+            f = g + h
+            if f > bound:
+                return f
+            if g >= stats['depth']:
+                stats['depth'] = g + 1 # nodes held on the current path
+            # An admissible heuristic is always 0 at the goal
+            if h == 0 and tiles == goal_tiles:
+                return FOUND
+
+            stats['expanded'] += 1
+            minimum = float('inf')
+            for new_blank in moves[blank]:
+                # Prune the move that undoes the previous move
+                if new_blank == prev:
+                    stats['duplicates'] += 1
+                    continue
+                stats['generated'] += 1
+
+                # Make move
+                tile = tiles[new_blank]
+                tiles[blank] = tile
+                tiles[new_blank] = 0
+                if incremental:
+                    child_h = h + heuristic.delta(tile, new_blank, blank)
+                else:
+                    child_h = heuristic(np.array(tiles).reshape(shape), self.goal)
+                path.append(new_blank)
+
+                t = search(new_blank, blank, g + 1, child_h, bound)
+                if t == FOUND:
+                    return FOUND
+
+                # Unmake move
+                path.pop()
+                tiles[new_blank] = tile
+                tiles[blank] = 0
+                minimum = min(minimum, t)
+
+            return minimum
+
+        blank = tiles.index(0)
+        h = heuristic(self.init, self.goal)
+        bound = h
+        while True:
+            t = search(blank, None, 0, h, bound)
+            self.expanded, self.generated = stats['expanded'], stats['generated']
+            self.report(expanded=self.expanded, generated=self.generated,
+                        duplicates=stats['duplicates'], frontier=stats['depth'])
+            if t == FOUND:
+                self.solution = self.path_to_node(path, heuristic)
+                if verbose:
+                    self.print_solution(self.solution)
+                    print("Nodes Expanded: {}".format(stats['expanded']))
+                    print("Nodes generated: {}".format(stats['generated']))
+                return True
+            if t == float('inf'):
+                self.solution = None
+                return False
+            bound = t
+
+class BidirectionalSearch(AStar):
+    """ Bidirectional breadth-first search for unit cost sliding puzzles.
+
+        Since both the initial and goal states are known, frontiers are grown
+        from both ends and the search stops once they meet in the middle. Each 
+        search only has to reach about half the solution depth which for deep
+        instances means far fewer expansions than a forward search.
+
+        Attributes:
+            init (ndarray): Initial state the algorithm will state in.
+
+            goal (ndarray): Goal state the algorithm needs to find.
+    """
+    uses_heuristic = False
+
+    def solve(self, heuristic, verbose=True, **kwargs):
+        """ Attempts to solve problem using bidirectional breadth-first search.
+
+            Notes:
+                The smaller frontier is always expanded one full layer at a time.
+                The first layer that touches the other search can contain several
+                meeting states, the one giving the shortest total path is kept
+                which makes the returned path optimal. Once a solution is found it
+                will print the required steps along with the h, g, and f scores 
+                for each step and the nodes expanded in each direction.
+
+            Args:
+                heuristic (func): A heuristic function thats input is the goal state.
+                    Only used to report the h-scores of the solution steps.
+
+                verbose (bool): If false nothing is printed, the solution and
+                    stats are only stored on the object.
+
+                kwargs (dict): Search options of AStar.solve() (e.g. weight) 
+                    which do not apply to this engine and are ignored.
+
+            Returns:
+                A boolean where a true value corresponds to solving the problem
+                while false corresponds to an unsolvable problem.
+        """
+        board = PackedBoard(self.init.shape)
+        moves, shifts, mask = board.moves, board.shifts, board.mask
+        init_code, init_blank = board.pack(self.init)
+        goal_code, goal_blank = board.pack(self.goal)
+
+        # visited[code] = (parent code, depth) for each direction
+        forward = {'visited': {init_code: (None, 0)}, 
+                   'frontier': [(init_code, init_blank)], 'expanded': 0}
+        backward = {'visited': {goal_code: (None, 0)}, 
+                    'frontier': [(goal_code, goal_blank)], 'expanded': 0}
+        generated = 0
+        duplicates = 0
+        peak = 0
+        next_report = self.interval
+
+        meet = init_code if init_code == goal_code else None
+        while meet is None and forward['frontier'] and backward['frontier']:
+            # Expand a full layer of the smaller frontier
+            if len(forward['frontier']) <= len(backward['frontier']):
+                this, other = forward, backward
+            else:
+                this, other = backward, forward
+            expanded = forward['expanded'] + backward['expanded']
+            if expanded >= next_report:
+                next_report = expanded + self.interval
+                self.report(
+                    expanded=expanded, generated=generated, duplicates=duplicates,
+                    frontier=len(forward['frontier']) + len(backward['frontier']))
+
+            visited, other_visited = this['visited'], other['visited']
+            best = float('inf')
+            new_frontier = []
+            for code, blank in this['frontier']:
+                this['expanded'] += 1
+                depth = visited[code][1] + 1
+                for new_blank in moves[blank]:
+                    generated += 1
+                    tile = (code >> shifts[new_blank]) & mask
+                    child = code - (tile << shifts[new_blank]) + (tile << shifts[blank])
+                    if child in visited:
+                        duplicates += 1
+                        continue
+                    visited[child] = (code, depth)
+                    new_frontier.append((child, new_blank))
+
+                    # Keep the meeting state with the shortest total path
+                    if child in other_visited:
+                        total = depth + other_visited[child][1]
+                        if total < best:
+                            best, meet = total, child
+            this['frontier'] = new_frontier
+            peak = max(peak, len(forward['frontier']) + len(backward['frontier']))
+
+        self.expanded = forward['expanded'] + backward['expanded']
+        self.expanded_forward = forward['expanded']
+        self.expanded_backward = backward['expanded']
+        self.generated = generated
+        self.metrics.update(duplicates=duplicates, frontier=peak)
+        if meet is None:
+            self.solution = None
+            return False
+
+        # Join both halves of the path at the meeting state
+        codes = []
+        code = meet
+        while code is not None:
+            codes.append(code)
+            code = forward['visited'][code][0]
+        codes.reverse()
+        code = backward['visited'][meet][0]
+        while code is not None:
+            codes.append(code)
+            code = backward['visited'][code][0]
+        
+        path = [int(np.flatnonzero(board.unpack(c) == 0)[0]) for c in codes[1:]]
+        self.solution = self.path_to_node(path, heuristic)
+        if verbose:
+            self.print_solution(self.solution)
+            print("Nodes Expanded (forward): {}".format(forward['expanded']))
+            print("Nodes Expanded (backward): {}".format(backward['expanded']))
+            print("Nodes generated: {}".format(generated))
+        return True
+
+class TableDescent(AStar):
+    """ Solves small puzzles by greedily descending an exact distance table.
+
+        Attributes:
+            init (ndarray): Initial state the algorithm will state in.
+
+            goal (ndarray): Goal state the algorithm needs to find.
+    """
+    uses_heuristic = False # always follows a DistanceTable
+
+    def solve(self, heuristic, verbose=True, **kwargs):
+        """ Attempts to solve problem by following a DistanceTable to the goal.
+
+            Notes:
+                Every step moves to a child whose distance is one less than its 
+                parent's, so the path is optimal and no search is needed. The
+                children are generated via PuzzleNode.generate_children. A 
+                ValueError is raised if no child is one closer or the descent
+                ends anywhere but the goal, which only happens with a stale or
+                corrupt table or one built for another goal.
+
+            Args:
+                heuristic (func): A DistanceTable built for the goal. Any other
+                    heuristic is replaced by a DistanceTable with the default
+                    cache directory.
+
+                verbose (bool): If false nothing is printed, the solution and
+                    stats are only stored on the object.
+
+                kwargs (dict): Search options of AStar.solve() (e.g. weight) 
+                    which do not apply to this engine and are ignored.
+
+            Returns:
+                A boolean where a true value corresponds to solving the problem
+                while false corresponds to an unsolvable problem.
+        """
+        table = getattr(heuristic, 'heuristic', heuristic) # unwrap TimedHeuristic
+        if not isinstance(table, DistanceTable):
+            table = DistanceTable(self.goal)
+
+        node = PuzzleNode(state=self.init, parent=None)
+        node.h = table(node.state)
+        node.f = node.h
+        self.solution = None
+        self.expanded, self.generated = 0, 0
+        if node.h == UNREACHABLE:
+            return False
+
+        while node.h > 0:
+            children = node.generate_children()
+            self.expanded += 1
+            self.generated += len(children)
+            for child in children:
+                child.h = table(child.state)
+                if child.h == node.h - 1:
+                    break
+            else:
+                raise ValueError(
+                    "No child descends the distance table, it does not match "
+                    "the goal or is corrupt!")
+            child.g = node.g + 1
+            child.f = child.g + child.h
+            node = child
+        if not np.array_equal(node.state, self.goal):
+            raise ValueError("The distance table was built for another goal!")
+
+        self.solution = node
+        if verbose:
+            self.print_solution(node)
+            print("Nodes Expanded: {}".format(self.expanded))
+            print("Nodes generated: {}".format(self.generated))
+        return True
+
+ENGINES = {
+    'astar': AStar,
+    'idastar': IDAStar,
+    'bidirectional': BidirectionalSearch,
+    'table': TableDescent,
+}
+
+def get_engine(name):
+    """ Looks up a search engine by name.
+
+        Args:
+            name (str): Name of the engine (see ENGINES).
+
+        Returns:
+            The engine class.
+    """
+    if name not in ENGINES:
+        raise ValueError("Engine name invalid!")
 
-        return total_steps
+    return ENGINES[name]
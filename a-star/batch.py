@@ -0,0 +1,255 @@
+import os
+import csv
+import json
+import time
+import queue
+import itertools
+import multiprocessing
+
+import numpy as np
+
+from a_star import get_engine
+from heuristics import get_heuristic
+from solution_cache import SolutionCache
+from solvability import canonicalize, duplicate_check, solvable, solvable_batch
+
+_heuristics = {} # heuristics built by the current process keyed on their goal
+_caches = {} # solution caches opened by the current process keyed on their path
+
+def read_instances(path):
+    """ Streams initial and goal state pairs from a JSONL or CSV file.
+
+        JSONL files hold one object per line with `init_state` and `goal_state`
+        given as nested lists (like the config) and an optional `id`. CSV files
+        need a header with `init_state` and `goal_state` columns (and optionally
+        `id`) where each board is given as space separated tiles in row-major
+        order.
+
+        Args:
+            path (str): Location of the .jsonl or .csv file.
+
+        Returns:
+            A generator of (id, init_state, goal_state) tuples.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, 'r', newline='') as stream:
+        if ext == '.csv':
+            for i, row in enumerate(csv.DictReader(stream)):
+                boards = []
+                for name in ['init_state', 'goal_state']:
+                    tiles = [int(t) for t in row[name].split()]
+                    side = int(round(np.sqrt(len(tiles))))
+                    boards.append(np.array(tiles).reshape(side, side))
+                yield row.get('id') or i, boards[0], boards[1]
+        elif ext in ['.jsonl', '.json']:
+            for i, line in enumerate(l for l in stream if l.strip()):
+                instance = json.loads(line)
+                yield (instance.get('id', i), np.array(instance['init_state']), 
+                       np.array(instance['goal_state']))
+        else:
+            raise ValueError("Invalid instance file type {}!".format(ext))
+
+def screen_instances(instances, chunksize=1024):
+    """ Validates instances in vectorized chunks before they reach the solver.
+
+        Instances are checked chunksize at a time, grouping each chunk by board
+        shape so solvable_batch() checks every group in one call.
+
+        Args:
+            instances (iterable): (id, init_state, goal_state) tuples, as given
+                by read_instances().
+
+            chunksize (int): Number of instances checked at a time.
+
+        Returns:
+            A generator of ((id, init_state, goal_state), result) pairs in the 
+            input order, where result is None for instances that should be 
+            solved and otherwise the final result (flagged with `solvable` set
+            to false or with an `error` message).
+    """
+    instances = iter(instances)
+    while True:
+        chunk = list(itertools.islice(instances, chunksize))
+        if not chunk:
+            return
+
+        results = [None] * len(chunk)
+        groups = {}
+        for i, (instance_id, init_state, goal_state) in enumerate(chunk):
+            if init_state.ndim != 2 or init_state.shape != goal_state.shape:
+                results[i] = {
+                    'id': instance_id, 
+                    'error': "Initial and goal state shapes do not match!"}
+            else:
+                groups.setdefault(init_state.shape, []).append(i)
+
+        for indices in groups.values():
+            valid, can_solve = solvable_batch(
+                np.stack([chunk[i][1] for i in indices]),
+                np.stack([chunk[i][2] for i in indices]))
+            for i, is_valid, is_solvable in zip(indices, valid, can_solve):
+                if not is_valid:
+                    results[i] = {
+                        'id': chunk[i][0], 
+                        'error': "Boards must hold the same distinct tiles and a blank (0)!"}
+                elif not is_solvable:
+                    results[i] = {'id': chunk[i][0], 'solvable': False}
+
+        for instance, result in zip(chunk, results):
+            yield instance, result
+
+def solve_instance(job):
+    """ Solves a single instance without printing, run inside the worker processes.
+
+        Args:
+            job (tuple): Instance id, initial state, goal state and the solver
+                options (engine, heuristic, heuristic_kwargs, representation and
+                optionally search, the extra keyword arguments of solve(), and 
+                cache, the keyword arguments of a SolutionCache).
+
+        Returns:
+            A dictionary with the moves, cost, expansions and wall time of the 
+            solution. Unsolvable instances are flagged with `solvable` set to 
+            false and invalid instances with an `error` message. Solutions
+            taken from the cache are flagged with `cached` set to true.
+    """
+    instance_id, init_state, goal_state, options = job
+    result = {'id': instance_id}
+
+    try:
+        duplicate_check(init_state)
+        duplicate_check(goal_state)
+        if init_state.shape != goal_state.shape:
+            raise ValueError("Initial and goal state shapes do not match!")
+        result['solvable'] = bool(solvable(init_state, goal_state, verbose=False))
+    except Exception as exc:
+        result['error'] = str(exc)
+        return result
+    if not result['solvable']:
+        return result
+
+    # Solve the canonical problem so caches and heuristics are shared by all
+    # problems that only differ by their tile labels
+    init_state, goal_state, _ = canonicalize(init_state, goal_state)
+
+    cache = None
+    if options.get('cache'):
+        path = options['cache']['path']
+        if path not in _caches:
+            _caches[path] = SolutionCache(**options['cache'])
+        cache = _caches[path]
+        cache_key = SolutionCache.key(init_state, goal_state)
+        start = time.monotonic()
+        moves = cache.get(cache_key)
+        if moves is not None:
+            result.update(
+                cached=True, time=time.monotonic() - start, moves=moves, 
+                cost=len(moves), expanded=0, generated=0)
+            return result
+
+    # Heuristic tables only need to be built once per goal in each process
+    goal_key = (options['heuristic'], goal_state.shape, goal_state.tobytes())
+    if goal_key not in _heuristics:
+        _heuristics[goal_key] = get_heuristic(
+            options['heuristic'], goal_state, **options['heuristic_kwargs'])
+    heuristic = _heuristics[goal_key]
+
+    engine = get_engine(options['engine'])(
+        init_state=init_state, goal_state=goal_state, 
+        packed=options['representation'] == "packed")
+    start = time.monotonic()
+    outcome = engine.search(heuristic=heuristic, **(options.get('search') or {}))
+    if not outcome.solved:
+        result['error'] = "No solution found within the time budget!"
+        return result
+    result['time'] = time.monotonic() - start
+
+    result['moves'] = ''.join(outcome.moves)
+    result['cost'] = outcome.cost
+    result['expanded'] = outcome.expanded
+    result['generated'] = outcome.generated
+    result['bound'] = outcome.bound
+    result['peak_frontier'] = outcome.metrics['peak_frontier']
+
+    # Only optimal solutions are cached
+    if cache is not None and engine.bound <= 1.0:
+        cache.put(cache_key, result['moves'])
+
+    return result
+
+def run_batch(params, input, output, workers=None, chunksize=1, cache=None):
+    """ Solves every instance of a file across a pool of processes.
+
+        Results are written to the output file as one JSON line per instance 
+        as soon as each instance is solved, so the order of the output does 
+        not necessarily match the input. At most two chunks per worker are 
+        queued at a time and the next ones are only read from the input once
+        they finish, so the memory used does not grow with the input size.
+
+        Args:
+            params (dict): The `a_star` section of the config which selects the
+                engine, heuristic, state representation and search options.
+
+            input (str): Location of the .jsonl or .csv instance file.
+
+            output (str): Location of the JSONL results file.
+
+            workers (int): Number of processes. If None all cores are used.
+
+            chunksize (int): Number of instances sent to a worker at a time.
+
+            cache (dict): Keyword arguments of the SolutionCache shared by the
+                workers (path and capacity). If None no cache is used.
+    """
+    options = {
+        'engine': params['engine'],
+        'heuristic': params['heuristic'],
+        'heuristic_kwargs': params.get(params['heuristic']) or {},
+        'representation': params['representation'],
+        'search': params.get('search'),
+        'cache': cache,
+    }
+    rejected = [] # results of the instances screened out before solving
+
+    def jobs():
+        for (i, init, goal), result in screen_instances(read_instances(input)):
+            if result is None:
+                yield i, init, goal, options
+            else:
+                rejected.append(result)
+
+    def results(pool):
+        pending = jobs()
+        done = queue.Queue() # finished chunks, put by the pool's result thread
+        window = 2 * (workers or os.cpu_count() or 1) # chunks queued at a time
+        queued = 0
+        while True:
+            while queued < window:
+                chunk = list(itertools.islice(pending, chunksize))
+                if not chunk:
+                    break
+                pool.map_async(solve_instance, chunk, chunksize=len(chunk),
+                               callback=done.put, error_callback=done.put)
+                queued += 1
+            while rejected:
+                yield rejected.pop()
+            if not queued:
+                return
+
+            solved = done.get()
+            queued -= 1
+            if isinstance(solved, BaseException):
+                raise solved
+            for result in solved:
+                yield result
+
+    unsolvable = 0
+    with open(output, 'w') as out, multiprocessing.Pool(workers) as pool:
+        for count, result in enumerate(results(pool), 1):
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+            if not result.get('solvable', False):
+                unsolvable += 1
+            print("Instances done: {}".format(count), end="\r")
+
+    print("\nUnsolvable or invalid instances: {}".format(unsolvable))
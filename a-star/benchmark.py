@@ -0,0 +1,54 @@
+import collections
+
+from batch import read_instances, solve_instance
+
+def run_benchmark(params, input, heuristics):
+    """ Compares heuristics by solving a fixed set of instances with each one.
+
+        Every solvable instance is solved once per heuristic (in this process so
+        the timings are comparable) and the nodes expanded, nodes generated and
+        solve time are summed per board size.
+
+        Args:
+            params (dict): The `a_star` section of the config which selects the
+                engine, state representation and search options, as well as the
+                options of each heuristic.
+
+            input (str): Location of the .jsonl or .csv instance file.
+
+            heuristics (list): Names of the heuristics to compare.
+
+        Returns:
+            A dictionary mapping (heuristic, board shape) to the summed stats.
+    """
+    instances = list(read_instances(input))
+    stats = collections.OrderedDict()
+
+    for name in heuristics:
+        options = {
+            'engine': params['engine'],
+            'heuristic': name,
+            'heuristic_kwargs': params.get(name) or {},
+            'representation': params['representation'],
+            'search': params.get('search'),
+        }
+        for instance_id, init_state, goal_state in instances:
+            result = solve_instance((instance_id, init_state, goal_state, options))
+            if not result.get('solvable', False):
+                continue
+            shape = 'x'.join(str(s) for s in init_state.shape)
+            totals = stats.setdefault(
+                (name, shape), 
+                {'instances': 0, 'expanded': 0, 'generated': 0, 'time': 0.0})
+            totals['instances'] += 1
+            for key in ['expanded', 'generated', 'time']:
+                totals[key] += result[key]
+
+    print("{:<18s}{:>6s}{:>6s}{:>14s}{:>14s}{:>12s}".format(
+        "Heuristic", "Board", "Count", "Expanded", "Generated", "Time (s)"))
+    for (name, shape), totals in stats.items():
+        print("{:<18s}{:>6s}{:>6d}{:>14d}{:>14d}{:>12.4f}".format(
+            name, shape, totals['instances'], totals['expanded'], 
+            totals['generated'], totals['time']))
+
+    return stats
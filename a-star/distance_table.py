@@ -0,0 +1,197 @@
+import math
+
+import numpy as np
+
+from lookup_tables import cached_table, move_table, table_path
+from solvability import canonicalize
+
+UNREACHABLE = 255 # marker for states that can not reach the goal
+
+def factorials(n):
+    """ Place values of a Lehmer code of length n, i.e. (n-1)!, ..., 1!, 0!. """
+    values = [1] * n
+    for i in range(n - 2, -1, -1):
+        values[i] = values[i + 1] * (n - 1 - i)
+
+    return np.array(values, dtype=np.int64)
+
+def rank(perms):
+    """ Ranks permutations by their Lehmer code.
+
+        The Lehmer code of a permutation counts, for every position, how many of
+        the later entries are smaller. Read as a factorial number system it gives
+        a unique index between 0 and n! - 1 for every permutation.
+
+        Args:
+            perms (ndarray): A single flat permutation of 0..n-1 or a (m, n) 
+                array of permutations.
+
+        Returns:
+            A int64 ndarray of m ranks.
+    """
+    perms = np.atleast_2d(perms)
+    n = perms.shape[1]
+    later = np.triu(np.ones((n, n), dtype=bool), 1)
+    smaller = perms[:, None, :] < perms[:, :, None]
+    codes = (smaller & later).sum(axis=2)
+
+    return codes @ factorials(n)
+
+def unrank(ranks, n):
+    """ Inverse of rank(), builds the permutations with the given ranks.
+
+        Args:
+            ranks (ndarray): m ranks between 0 and n! - 1.
+
+            n (int): Length of the permutations.
+
+        Returns:
+            A (m, n) int64 ndarray of permutations of 0..n-1.
+    """
+    ranks = np.atleast_1d(np.asarray(ranks, dtype=np.int64))
+    m = len(ranks)
+    codes = (ranks[:, None] // factorials(n)) % np.arange(n, 0, -1)
+
+    # Entry i is the codes[:, i]-th smallest value not used yet
+    remaining = np.tile(np.arange(n, dtype=np.int64), (m, 1))
+    perms = np.empty((m, n), dtype=np.int64)
+    for i in range(n):
+        perms[:, i] = remaining[np.arange(m), codes[:, i]]
+        keep = np.arange(n - i) != codes[:, i, None]
+        remaining = remaining[keep].reshape(m, n - i - 1)
+
+    return perms
+
+def build_table(goal):
+    """ Computes the exact distance of every state to the goal.
+
+        A breadth-first search is run from the goal over the whole state space
+        one layer at a time, with each layer held as a single array of boards.
+
+        Args:
+            goal (ndarray): Goal state.
+
+        Returns:
+            A uint8 ndarray of n! entries indexed by rank() holding the number
+            of moves to the goal (UNREACHABLE for unsolvable states).
+
+        Notes:
+            Only half of the n! states can reach the goal. The other half is
+            kept on purpose: indexing by the plain Lehmer rank needs no parity
+            adjustment and an UNREACHABLE lookup doubles as an O(1) solvability
+            check. For the 3x3 board this costs 181,440 extra bytes.
+    """
+    goal = np.asarray(goal)
+    size = goal.size
+    moves = move_table(goal.shape)
+
+    dist = np.full(math.factorial(size), UNREACHABLE, dtype=np.uint8)
+    frontier = goal.reshape(1, size).astype(np.uint8)
+    dist[rank(frontier)] = 0
+    depth = 0
+    while len(frontier):
+        blanks = np.argmax(frontier == 0, axis=1)
+        children = []
+        for direction in range(4):
+            targets = moves[blanks, direction]
+            valid = targets >= 0
+            boards = frontier[valid].copy()
+            rows_idx = np.arange(len(boards))
+            boards[rows_idx, blanks[valid]] = boards[rows_idx, targets[valid]]
+            boards[rows_idx, targets[valid]] = 0
+            children.append(boards)
+        children = np.concatenate(children)
+
+        ranks, first = np.unique(rank(children), return_index=True)
+        new = dist[ranks] == UNREACHABLE
+        depth += 1
+        dist[ranks[new]] = depth
+        frontier = children[first[new]]
+
+    return dist
+
+class DistanceTable(object):
+    """ Exact distance table for small sliding puzzles (up to 3x3).
+
+        The table is built once per goal by build_table(), saved as a .npy file 
+        in cache_dir and memory mapped on later runs. It can be used as a
+        perfect heuristic or by the TableDescent engine which solves a puzzle by
+        greedily following the table without any search. The table is built
+        for the canonical form of the goal (see canonicalize()) so goals that 
+        only differ by their tile labels share the same file.
+
+        Attributes:
+            goal (ndarray): Goal state the heuristic was built for.
+
+            canonical_goal (ndarray): Relabeled goal the table was built for.
+
+            labels (list): labels[tile] is the canonical label of a tile.
+
+            table (ndarray): uint8 memory map of distances indexed by rank().
+    """
+    max_size = 9 # n! entries are needed so larger boards are not supported
+
+    def __init__(self, goal, cache_dir='tables'):
+        self.goal = np.asarray(goal)
+        _, self.canonical_goal, labels = canonicalize(self.goal, self.goal)
+        if sorted(labels) != list(range(self.goal.size)):
+            raise ValueError("Distance tables need the tiles 0 to n-1!")
+        self.labels = [labels[t] for t in range(self.goal.size)]
+        if self.goal.size > self.max_size:
+            raise ValueError(
+                "Distance tables only support boards with up to {} tiles!".format(
+                    self.max_size))
+        self.table = self.load(cache_dir)
+
+    def path(self, cache_dir):
+        """ File name of the table, unique to the canonical goal. """
+        key = self.canonical_goal.astype(np.int64).tobytes()
+
+        return table_path(cache_dir, 'table', self.goal.shape, key)
+
+    def load(self, cache_dir):
+        """ Memory maps the table, building and saving it first if needed.
+
+            Args:
+                cache_dir (str): Directory the tables are stored in.
+        """
+        return cached_table(
+            self.path(cache_dir), lambda: build_table(self.canonical_goal))
+
+    def __call__(self, state, goal=None):
+        """ Looks up the exact distance of a state to the goal.
+
+            Args:
+                state (ndarray): Current state
+
+                goal (ndarray): Unused since the goal is fixed when the table is
+                    built. Kept for compatibility with the scalar 
+                    heuristic(state, goal) interface.
+
+            Returns:
+                The number of moves to the goal or UNREACHABLE.
+        """
+        labels = self.labels
+        flat = [labels[t] for t in np.asarray(state).ravel().tolist()]
+        n = len(flat)
+        idx = 0
+        for i, tile in enumerate(flat):
+            idx = idx * (n - i) + sum(1 for t in flat[i+1:] if t < tile)
+
+        return int(self.table[idx])
+
+    def batch(self, states, goal=None):
+        """ Looks up the exact distances of a stack of states in a single call.
+
+            Args:
+                states (ndarray): (k, rows, cols) stack of states.
+
+                goal (ndarray): Unused, see __call__().
+
+            Returns:
+                A ndarray of k distances.
+        """
+        labels = np.asarray(self.labels)
+        flat = labels[states.reshape(len(states), -1)]
+
+        return self.table[rank(flat)].astype(np.int64)
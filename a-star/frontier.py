@@ -0,0 +1,156 @@
+import os
+import heapq
+import pickle
+import sqlite3
+import itertools
+
+class SpillingFrontier(object):
+    """ Priority queue that keeps at most `capacity` entries in memory.
+
+        Once the in-memory heap grows past its capacity the worst half of it
+        (the entries with the largest f-scores) is moved to disk, with one 
+        bucket file per f-score. Buckets are loaded back, smallest f-score first,
+        once the in-memory heap no longer holds anything better, so entries 
+        still come out in f-score order. Every spill appends its own record to
+        a bucket and only one record is loaded at a time, spilling again if it
+        pushes the heap past its capacity.
+
+        Attributes:
+            capacity (int): Maximum number of entries kept in memory.
+
+            spill_dir (str): Directory the bucket files are written to.
+
+            spilled (int): Number of entries currently on disk.
+    """
+    def __init__(self, capacity, spill_dir):
+        self.capacity = capacity
+        self.spill_dir = spill_dir
+        self.heap = []
+        self.tie = itertools.count()
+        self.buckets = {} # f-score -> offset of the next record in its bucket file
+        self.bucket_heap = [] # f-scores of the buckets on disk
+        self.spilled = 0
+
+    def __len__(self):
+        return len(self.heap) + self.spilled
+
+    def bucket_path(self, f):
+        return os.path.join(self.spill_dir, 'frontier-{}.pkl'.format(f))
+
+    def push(self, f, entry):
+        """ Adds an entry, spilling the worst entries to disk if over capacity.
+
+            Args:
+                f (int): F-score of the entry.
+
+                entry (tuple): Any picklable object.
+        """
+        heapq.heappush(self.heap, (f, -next(self.tie), entry))
+        if len(self.heap) > self.capacity:
+            self.spill()
+
+    def spill(self):
+        """ Moves the worst half of the in-memory entries to their buckets. """
+        self.heap.sort()
+        keep = max(1, self.capacity // 2)
+        spill, self.heap = self.heap[keep:], self.heap[:keep]
+
+        for f, group in itertools.groupby(spill, key=lambda item: item[0]):
+            entries = [entry for _, _, entry in group]
+            with open(self.bucket_path(f), 'ab') as bucket:
+                pickle.dump(entries, bucket, protocol=pickle.HIGHEST_PROTOCOL)
+            if f not in self.buckets:
+                heapq.heappush(self.bucket_heap, f)
+                self.buckets[f] = 0
+            self.spilled += len(entries)
+
+    def load(self, f):
+        """ Moves the next record of a bucket back into memory. """
+        path = self.bucket_path(f)
+        with open(path, 'rb') as bucket:
+            bucket.seek(self.buckets[f])
+            entries = pickle.load(bucket)
+            self.buckets[f] = bucket.tell()
+            done = not bucket.read(1)
+        if done:
+            os.remove(path)
+            del self.buckets[f]
+            heapq.heappop(self.bucket_heap)
+
+        for entry in entries:
+            heapq.heappush(self.heap, (f, -next(self.tie), entry))
+        self.spilled -= len(entries)
+        if len(self.heap) > self.capacity:
+            self.spill()
+
+    def pop(self):
+        """ Removes the entry with the smallest f-score.
+
+            Returns:
+                The f-score and the entry.
+        """
+        if self.bucket_heap and (not self.heap or self.heap[0][0] > self.bucket_heap[0]):
+            self.load(self.bucket_heap[0])
+        f, _, entry = heapq.heappop(self.heap)
+
+        return f, entry
+
+class SpillingDict(object):
+    """ Dictionary that keeps at most `capacity` items in memory.
+
+        Once the in-memory dictionary grows past its capacity all of its items
+        are written to a SQLite database on disk, which is then checked whenever
+        a key is not found in memory.
+
+        Attributes:
+            capacity (int): Maximum number of items kept in memory.
+
+            spilled (int): Number of items on disk.
+    """
+    def __init__(self, capacity, spill_dir):
+        self.capacity = capacity
+        self.items = {}
+        self.spilled = 0
+        self.connection = sqlite3.connect(os.path.join(spill_dir, 'closed.db'))
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS items (key BLOB PRIMARY KEY, value BLOB)")
+
+    def __len__(self):
+        return len(self.items) + self.spilled
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __setitem__(self, key, value):
+        self.items[key] = value
+        if len(self.items) > self.capacity:
+            self.spill()
+
+    def get(self, key):
+        """ Looks up a key in memory first and on disk second.
+
+            Returns:
+                The value or None if the key is unknown.
+        """
+        if key in self.items:
+            return self.items[key]
+        if not self.spilled:
+            return None
+        row = self.connection.execute(
+            "SELECT value FROM items WHERE key = ?", (pickle.dumps(key),)).fetchone()
+
+        return None if row is None else pickle.loads(row[0])
+
+    def spill(self):
+        """ Moves every in-memory item to disk. """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO items (key, value) VALUES (?, ?)",
+                ((pickle.dumps(k), pickle.dumps(v)) for k, v in self.items.items()))
+        self.spilled = self.connection.execute(
+            "SELECT COUNT(*) FROM items").fetchone()[0]
+        self.items = {}
+
+    def close(self):
+        """ Closes the database connection. """
+        self.connection.close()
@@ -0,0 +1,372 @@
+import abc
+import bisect
+import collections
+
+import numpy as np
+
+from distance_table import DistanceTable
+from pattern_database import PatternDatabase
+
+def misplaced(state, goal):
+    """ Calculates the total number of numbers out of place.
+
+        Finds the total number of mismatches between the state and goal.
+
+        Args:
+            state (ndarray): Current state
+
+            goal (ndarray): Goal state
+
+        Returns:
+            An interger valued heuristic representing the number of out of place
+            numbers (tiles) with respect to the goal state. 
+    """
+
+    return  np.count_nonzero(state-goal)
+
+def manhattan(state, goal):
+    """ Calculates the manhattan distance given two states.
+
+        Finds the coordinates of all numbers (tiles) in the state and goal. The 
+        absolute difference between the state's and goal's corresponding numbers
+        is then computed and summed.
+
+        Args:
+            state (ndarray): Current state
+
+            goal (ndarray): Goal state
+
+        Returns:
+            An interger valued heuristic representing the sum of all the numbers
+            distances (city block distance) from their goal position.
+    """
+    distance = 0
+
+    for i in range(1, len(state.ravel())):
+        state_coords = np.hstack(np.where(state == i))
+        goal_coords = np.hstack(np.where(goal == i))
+
+        distance += np.abs(state_coords - goal_coords).sum() 
+
+    return distance
+
+def misplaced_batch(states, goal):
+    """ Vectorized misplaced() for a stack of states.
+
+        Args:
+            states (ndarray): (k, rows, cols) stack of states.
+
+            goal (ndarray): Goal state
+
+        Returns:
+            A ndarray of k heuristic values.
+    """
+    return np.count_nonzero(states - goal, axis=(1, 2))
+
+def manhattan_batch(states, goal):
+    """ Vectorized manhattan() for a stack of states.
+
+        Args:
+            states (ndarray): (k, rows, cols) stack of states.
+
+            goal (ndarray): Goal state
+
+        Returns:
+            A ndarray of k heuristic values.
+    """
+    cols = goal.shape[1]
+    goal_pos = np.argsort(goal.ravel()) # flat goal position of every tile
+    flat = states.reshape(len(states), -1)
+    pos = np.arange(flat.shape[1])
+    target = goal_pos[flat]
+    distance = (np.abs(pos // cols - target // cols) 
+                + np.abs(pos % cols - target % cols))
+
+    return np.where(flat != 0, distance, 0).sum(axis=1)
+
+misplaced.batch = misplaced_batch
+manhattan.batch = manhattan_batch
+
+class TileHeuristic(abc.ABC):
+    """ Base class for heuristics that are a sum of independent per-tile costs.
+
+        A table holding the cost of every tile at every position is precomputed
+        once per goal. The heuristic of a full state is then a sum of table
+        lookups and, since a move only slides a single tile into the blank, the
+        heuristic of a child can be updated from its parent in O(1) via delta().
+        Subclasses must implement cost().
+
+        Attributes:
+            goal (ndarray): Goal state the table was built for.
+
+            table (tuple): table[tile][pos] holds the cost of the tile being at
+                the flat index pos.
+    """
+    def __init__(self, goal):
+        self.goal = np.asarray(goal)
+        goal_flat = self.goal.ravel()
+        self.table = tuple(
+            tuple(self.cost(tile, pos) for pos in range(len(goal_flat)))
+            for tile in range(len(goal_flat)))
+        self.table_array = np.array(self.table)
+
+    @abc.abstractmethod
+    def cost(self, tile, pos):
+        """ Cost of a single tile being at a given position.
+
+            Args:
+                tile (int): Number (tile) on the board.
+
+                pos (int): Flat index of the tile.
+        """
+
+    def __call__(self, state, goal=None):
+        """ Calculates the heuristic of a full state.
+
+            Args:
+                state (ndarray): Current state
+
+                goal (ndarray): Unused since the goal is fixed when the tables 
+                    are built. Kept for compatibility with the scalar 
+                    heuristic(state, goal) interface.
+        """
+        table = self.table
+        return sum(table[tile][pos] for pos, tile in enumerate(state.ravel().tolist()))
+
+    def batch(self, states, goal=None):
+        """ Calculates the heuristic of a stack of states in a single call.
+
+            Args:
+                states (ndarray): (k, rows, cols) stack of states.
+
+                goal (ndarray): Unused, see __call__().
+
+            Returns:
+                A ndarray of k heuristic values.
+        """
+        flat = states.reshape(len(states), -1)
+
+        return self.table_array[flat, np.arange(flat.shape[1])].sum(axis=1)
+
+    def delta(self, tile, src, dst):
+        """ Change of the heuristic when a single tile slides into the blank.
+
+            Args:
+                tile (int): Number (tile) being moved.
+
+                src (int): Flat index the tile is moving from (the new blank).
+
+                dst (int): Flat index the tile is moving to (the old blank).
+        """
+        table = self.table
+        return (table[tile][dst] - table[tile][src]
+                + table[0][src] - table[0][dst])
+
+class Manhattan(TileHeuristic):
+    """ Incremental version of manhattan() using precomputed goal coordinates. """
+
+    def __init__(self, goal):
+        goal = np.asarray(goal)
+        self.goal_coords = {
+            int(tile): divmod(pos, goal.shape[1])
+            for pos, tile in enumerate(goal.ravel())}
+        self.cols = goal.shape[1]
+        super().__init__(goal)
+
+    def cost(self, tile, pos):
+        if tile == 0:
+            return 0
+        row, col = divmod(pos, self.cols)
+        goal_row, goal_col = self.goal_coords[tile]
+
+        return abs(row - goal_row) + abs(col - goal_col)
+
+class Misplaced(TileHeuristic):
+    """ Incremental version of misplaced(). Like misplaced() the blank counts. """
+
+    def cost(self, tile, pos):
+        return int(self.goal.ravel()[pos] != tile)
+
+def line_conflicts(goal_positions):
+    """ Minimum number of tiles to remove from a line to leave it in goal order.
+
+        This is the length of the line minus its longest increasing subsequence.
+
+        Args:
+            goal_positions (list): Goal positions (along the line) of the tiles
+                that are in their goal line, in the order they appear.
+    """
+    tails = []
+    for pos in goal_positions:
+        i = bisect.bisect_left(tails, pos)
+        if i == len(tails):
+            tails.append(pos)
+        else:
+            tails[i] = pos
+
+    return len(goal_positions) - len(tails)
+
+class LinearConflict(object):
+    """ Manhattan distance plus linear conflicts.
+
+        Two tiles are in linear conflict when they are both in their goal row
+        (or column) but in reversed order, meaning one of them has to leave the
+        line and come back which costs 2 moves on top of the Manhattan distance.
+        For every line the minimum number of tiles that have to leave is used.
+
+        Attributes:
+            goal (ndarray): Goal state the heuristic was built for.
+    """
+    def __init__(self, goal):
+        self.goal = np.asarray(goal)
+        self.manhattan = Manhattan(self.goal)
+
+    def __call__(self, state, goal=None):
+        """ Calculates the heuristic of a full state.
+
+            Args:
+                state (ndarray): Current state
+
+                goal (ndarray): Unused since the goal is fixed at construction.
+                    Kept for compatibility with the scalar heuristic(state, goal)
+                    interface.
+        """
+        state = np.asarray(state)
+        goal_coords = self.manhattan.goal_coords
+        conflicts = 0
+
+        for row, tiles in enumerate(state.tolist()):
+            conflicts += line_conflicts(
+                [goal_coords[t][1] for t in tiles if t and goal_coords[t][0] == row])
+        for col, tiles in enumerate(state.T.tolist()):
+            conflicts += line_conflicts(
+                [goal_coords[t][0] for t in tiles if t and goal_coords[t][1] == col])
+
+        return self.manhattan(state) + 2 * conflicts
+
+_walking_tables = {} # tables built so far keyed on (lines, width, blank_line)
+
+def walking_table(lines, width, blank_line):
+    """ Builds the walking distance table for one direction of a board.
+
+        The abstract state counts, for every line (row or column), how many of
+        its tiles have their goal in each line, along with the line of the 
+        blank. Moving the blank to a neighboring line brings one tile from that
+        line over. A breadth-first search from the goal gives the number of 
+        such moves needed to reach the goal from every abstract state.
+
+        Args:
+            lines (int): Number of lines (rows for vertical moves).
+
+            width (int): Number of cells in each line.
+
+            blank_line (int): Line the blank is in at the goal.
+
+        Returns:
+            A dictionary mapping (counts, blank line) to a distance where counts
+            is the flattened lines x lines count matrix.
+    """
+    key = (lines, width, blank_line)
+    if key in _walking_tables:
+        return _walking_tables[key]
+
+    counts = [0] * (lines * lines)
+    for line in range(lines):
+        counts[line * lines + line] = width
+    counts[blank_line * lines + blank_line] -= 1
+    start = (tuple(counts), blank_line)
+
+    table = {start: 0}
+    queue = collections.deque([start])
+    while queue:
+        state = queue.popleft()
+        counts, blank = state
+        for line in [blank - 1, blank + 1]:
+            if line < 0 or line >= lines:
+                continue
+            for goal_line in range(lines):
+                if counts[line * lines + goal_line] == 0:
+                    continue
+                new_counts = list(counts)
+                new_counts[line * lines + goal_line] -= 1
+                new_counts[blank * lines + goal_line] += 1
+                new_state = (tuple(new_counts), line)
+                if new_state not in table:
+                    table[new_state] = table[state] + 1
+                    queue.append(new_state)
+
+    _walking_tables[key] = table
+    return table
+
+class WalkingDistance(object):
+    """ Walking distance heuristic.
+
+        Vertical and horizontal moves are counted separately using precomputed
+        walking_table()s. Unlike Manhattan distance tiles in the same line block
+        each other, which makes the heuristic stronger while staying admissible.
+
+        Attributes:
+            goal (ndarray): Goal state the heuristic was built for.
+    """
+    def __init__(self, goal):
+        self.goal = np.asarray(goal)
+        rows, cols = self.goal.shape
+        blank_row, blank_col = divmod(int(np.flatnonzero(self.goal == 0)[0]), cols)
+        self.goal_coords = {
+            int(tile): divmod(pos, cols) for pos, tile in enumerate(self.goal.ravel())}
+        self.vertical = walking_table(rows, cols, blank_row)
+        self.horizontal = walking_table(cols, rows, blank_col)
+
+    def __call__(self, state, goal=None):
+        """ Calculates the heuristic of a full state.
+
+            Args:
+                state (ndarray): Current state
+
+                goal (ndarray): Unused since the goal is fixed at construction.
+                    Kept for compatibility with the scalar heuristic(state, goal)
+                    interface.
+        """
+        rows, cols = self.goal.shape
+        vertical = [0] * (rows * rows)
+        horizontal = [0] * (cols * cols)
+
+        for pos, tile in enumerate(np.asarray(state).ravel().tolist()):
+            row, col = divmod(pos, cols)
+            if tile == 0:
+                blank_row, blank_col = row, col
+                continue
+            goal_row, goal_col = self.goal_coords[tile]
+            vertical[row * rows + goal_row] += 1
+            horizontal[col * cols + goal_col] += 1
+
+        return (self.vertical[(tuple(vertical), blank_row)]
+                + self.horizontal[(tuple(horizontal), blank_col)])
+
+HEURISTICS = {
+    'manhattan': Manhattan,
+    'misplaced': Misplaced,
+    'linear_conflict': LinearConflict,
+    'walking_distance': WalkingDistance,
+    'pdb': PatternDatabase,
+    'table': DistanceTable,
+}
+
+def get_heuristic(name, goal, **kwargs):
+    """ Builds a heuristic by name.
+
+        Args:
+            name (str): Name of the heuristic (see HEURISTICS).
+
+            goal (ndarray): Goal state the heuristic is built for.
+
+            kwargs (dict): Extra options passed to the heuristic (e.g. the 
+                tiles and cache_dir of PatternDatabase).
+
+        Returns:
+            A callable heuristic(state, goal) which may also support delta().
+    """
+    if name not in HEURISTICS:
+        raise ValueError("Heuristic name invalid!")
+
+    return HEURISTICS[name](goal, **kwargs)
@@ -0,0 +1,74 @@
+import os
+import hashlib
+
+import numpy as np
+
+def move_table(shape):
+    """ Positions the blank can move to from every position of a board.
+
+        Args:
+            shape (tuple): Rows and columns of the board.
+
+        Returns:
+            A (size, 4) int64 ndarray holding, for every flat blank position,
+            the flat position reached by moving it left, right, up and down,
+            with -1 marking a move off the board.
+    """
+    rows, cols = shape
+    size = rows * cols
+    moves = np.full((size, 4), -1, dtype=np.int64)
+    for pos in range(size):
+        row, col = divmod(pos, cols)
+        if col > 0:
+            moves[pos, 0] = pos - 1
+        if col < cols - 1:
+            moves[pos, 1] = pos + 1
+        if row > 0:
+            moves[pos, 2] = pos - cols
+        if row < rows - 1:
+            moves[pos, 3] = pos + cols
+
+    return moves
+
+def table_path(cache_dir, prefix, shape, key):
+    """ File name of a cached table.
+
+        Args:
+            cache_dir (str): Directory the tables are stored in.
+
+            prefix (str): Kind of table (e.g. pdb or table).
+
+            shape (tuple): Shape of the boards the table is built for.
+
+            key (bytes): Whatever the table depends on besides the shape,
+                hashed into the file name.
+    """
+    digest = hashlib.sha1(key).hexdigest()[:12]
+    shape = 'x'.join(str(s) for s in shape)
+
+    return os.path.join(cache_dir, '{}-{}-{}.npy'.format(prefix, shape, digest))
+
+def cached_table(path, build):
+    """ Memory maps a table, building and saving it first if needed.
+
+        The table is written to a temporary file which is then renamed, so
+        processes building the same table at once never read a partial file.
+
+        Args:
+            path (str): Location of the .npy file.
+
+            build (func): Called without arguments to build the table if the
+                file does not exist yet.
+
+        Returns:
+            A read-only memory map of the table.
+    """
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        table = build()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, table)
+        os.replace(tmp_path, path)
+
+    return np.load(path, mmap_mode='r')
@@ -0,0 +1,123 @@
+import time
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+def peak_rss():
+    """ Peak resident set size of the current process in kilobytes, or None. """
+    if resource is None:
+        return None
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+class SearchMetrics(object):
+    """ Counters and timings collected while an engine searches.
+
+        Attributes:
+            expanded (int): Nodes expanded so far.
+
+            generated (int): Nodes generated so far.
+
+            duplicates (int): Generated or popped nodes dropped because their 
+                state was already explored or reached more cheaply. For IDA*
+                these are the pruned moves that undo the previous move.
+
+            peak_frontier (int): Largest frontier size seen. For IDA*, which
+                keeps no frontier, the longest path held in memory.
+
+            heuristic_time (float): Seconds spent evaluating the heuristic, only
+                measured when the heuristic is wrapped in a TimedHeuristic.
+
+            final (bool): True once the search has finished.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.peak_frontier = 0
+        self.heuristic_time = 0.0
+        self.final = False
+
+    def update(self, **counters):
+        """ Sets counters, keeping the largest frontier size seen. """
+        frontier = counters.pop('frontier', 0)
+        self.peak_frontier = max(self.peak_frontier, frontier)
+        for name, value in counters.items():
+            setattr(self, name, value)
+
+    @property
+    def elapsed(self):
+        """ Seconds since the search started. """
+        return time.perf_counter() - self.start
+
+    def snapshot(self):
+        """ Summarizes the metrics.
+
+            Returns:
+                A dictionary with the counters, expansions per second, the share 
+                of the time spent in the heuristic and the peak RSS (KB).
+        """
+        elapsed = self.elapsed
+        return {
+            'expanded': self.expanded,
+            'generated': self.generated,
+            'duplicates': self.duplicates,
+            'peak_frontier': self.peak_frontier,
+            'elapsed': elapsed,
+            'expansions_per_sec': self.expanded / elapsed if elapsed else 0.0,
+            'heuristic_share': self.heuristic_time / elapsed if elapsed else 0.0,
+            'peak_rss_kb': peak_rss(),
+        }
+
+class TimedHeuristic(object):
+    """ Wraps a heuristic to add the time spent evaluating it to SearchMetrics.
+
+        The batch() and delta() forms are only exposed if the wrapped heuristic
+        provides them, so engines pick the same evaluation path as without the
+        wrapper.
+
+        Attributes:
+            heuristic (func): The wrapped heuristic.
+
+            metrics (SearchMetrics): Metrics the time is added to.
+    """
+    def __init__(self, heuristic, metrics):
+        self.heuristic = heuristic
+        self.metrics = metrics
+        for name in ['batch', 'delta']:
+            if hasattr(heuristic, name):
+                setattr(self, name, self.timed(getattr(heuristic, name)))
+
+    def timed(self, func):
+        def wrapper(*args):
+            start = time.perf_counter()
+            value = func(*args)
+            self.metrics.heuristic_time += time.perf_counter() - start
+            return value
+
+        return wrapper
+
+    def __call__(self, state, goal=None):
+        start = time.perf_counter()
+        value = self.heuristic(state, goal)
+        self.metrics.heuristic_time += time.perf_counter() - start
+
+        return value
+
+def print_metrics(metrics):
+    """ Human-readable metrics consumer, can be passed as an engine callback.
+
+        Args:
+            metrics (SearchMetrics): Metrics to print.
+    """
+    stats = metrics.snapshot()
+    rss = stats['peak_rss_kb']
+    print("{} expanded: {} generated: {} duplicates: {} peak frontier: {} "
+          "expansions/sec: {:.0f} heuristic time: {:.1%} peak RSS: {}".format(
+              "Done" if metrics.final else "Searching", stats['expanded'], 
+              stats['generated'], stats['duplicates'], stats['peak_frontier'], 
+              stats['expansions_per_sec'], stats['heuristic_share'], 
+              "{:.1f} MB".format(rss / 1024) if rss is not None else "n/a"))
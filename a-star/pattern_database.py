@@ -0,0 +1,194 @@
+import numpy as np
+
+from lookup_tables import cached_table, move_table, table_path
+from solvability import canonicalize
+
+UNSEEN = 255 # marker for abstract states not reached yet
+
+def default_tiles(goal):
+    """ Splits the tiles of a goal into disjoint groups.
+
+        Groups of 4 tiles are used for boards up to 3x3 and groups of 5 tiles
+        for larger boards which keeps every database small enough to build
+        quickly.
+
+        Args:
+            goal (ndarray): Goal state.
+
+        Returns:
+            A list of tile groups (lists of ints).
+    """
+    tiles = sorted(int(t) for t in np.asarray(goal).ravel() if t != 0)
+    group_size = 4 if goal.size <= 9 else 5
+
+    return [tiles[i:i+group_size] for i in range(0, len(tiles), group_size)]
+
+def build_pattern(goal, tiles):
+    """ Builds a single pattern database by backward BFS from the goal.
+
+        The abstract state only tracks the positions of the pattern tiles and the
+        blank. Moving the blank onto a non-pattern tile costs nothing while moving
+        a pattern tile costs 1, so a 0-1 BFS is run one cost level at a time. 
+        Only counting the moves of the pattern tiles is what allows several
+        disjoint databases to be added together while staying admissible.
+
+        States are indexed as sum(pos_j * size**j) + blank * size**k where pos_j
+        is the flat position of the j-th pattern tile and k the number of tiles.
+
+        Args:
+            goal (ndarray): Goal state.
+
+            tiles (list): Tiles that make up the pattern.
+
+        Returns:
+            A uint8 ndarray of size**k entries holding the minimum number of 
+            pattern tile moves, taken over all blank positions.
+    """
+    goal = np.asarray(goal)
+    size, k = goal.size, len(tiles)
+    radix = size ** np.arange(k) # place value of each pattern tile
+    blank_radix = size ** k
+    moves = move_table(goal.shape)
+
+    def decode(idx):
+        positions = (idx[:, None] // radix) % size
+        return positions, idx // blank_radix
+
+    goal_flat = goal.ravel().tolist()
+    start = sum(goal_flat.index(t) * size**j for j, t in enumerate(tiles))
+    start += goal_flat.index(0) * blank_radix
+
+    dist = np.full(size ** (k + 1), UNSEEN, dtype=np.uint8)
+    dist[start] = 0
+    frontier = np.array([start], dtype=np.int64)
+    cost = 0
+    while frontier.size:
+        # Expand the level with free moves of the blank over non-pattern tiles
+        level = [frontier]
+        new = frontier
+        while new.size:
+            positions, blank = decode(new)
+            targets = moves[blank]
+            occupied = (targets[:, :, None] == positions[:, None, :]).any(axis=2)
+            valid = (targets >= 0) & ~occupied
+            cand = (new[:, None] + (targets - blank[:, None]) * blank_radix)[valid]
+            cand = np.unique(cand)
+            new = cand[dist[cand] == UNSEEN]
+            dist[new] = cost
+            level.append(new)
+        level = np.concatenate(level)
+
+        # Moving a pattern tile into the blank costs 1
+        positions, blank = decode(level)
+        targets = moves[blank]
+        hits = targets[:, :, None] == positions[:, None, :]
+        row_idx, move_idx, tile_idx = np.nonzero(hits)
+        target = targets[row_idx, move_idx]
+        old_blank = blank[row_idx]
+        cand = (level[row_idx] 
+                + (old_blank - target) * radix[tile_idx]
+                + (target - old_blank) * blank_radix)
+        cand = np.unique(cand)
+        frontier = cand[dist[cand] == UNSEEN]
+        cost += 1
+        dist[frontier] = cost
+
+    return dist.reshape(size, blank_radix).min(axis=0)
+
+class PatternDatabase(object):
+    """ Disjoint additive pattern database heuristic.
+
+        One database is built per tile group by backward BFS from the goal. The
+        databases are saved as .npy files in cache_dir and memory mapped on
+        later runs so they only need to be generated once per goal. The 
+        databases are built for the canonical form of the goal (see 
+        canonicalize()) so goals that only differ by their tile labels share
+        the same files.
+
+        Attributes:
+            goal (ndarray): Goal state the heuristic was built for.
+
+            canonical_goal (ndarray): Relabeled goal the databases were built for.
+
+            labels (list): labels[tile] is the canonical label of a tile.
+
+            tiles (list): Disjoint canonical tile groups, one per database.
+
+            tables (list): uint8 ndarrays (memory maps) of each database.
+    """
+    def __init__(self, goal, tiles=None, cache_dir='pdb'):
+        self.goal = np.asarray(goal)
+        _, self.canonical_goal, labels = canonicalize(self.goal, self.goal)
+        if sorted(labels) != list(range(self.goal.size)):
+            raise ValueError("Pattern databases need the tiles 0 to n-1!")
+        self.labels = [labels[t] for t in range(self.goal.size)]
+        if tiles is None:
+            self.tiles = default_tiles(self.canonical_goal)
+        else:
+            self.tiles = [[self.labels[t] for t in group] for group in tiles]
+        self.size = self.goal.size
+        self.tables = [self.load(t, cache_dir) for t in self.tiles]
+
+    def path(self, tiles, cache_dir):
+        """ File name of a database, unique to the canonical goal and tile group. """
+        key = self.canonical_goal.astype(np.int64).tobytes() + str(tiles).encode()
+
+        return table_path(cache_dir, 'pdb', self.goal.shape, key)
+
+    def load(self, tiles, cache_dir):
+        """ Memory maps a database, building and saving it first if needed.
+
+            Args:
+                tiles (list): Tiles that make up the pattern.
+
+                cache_dir (str): Directory the databases are stored in.
+        """
+        return cached_table(self.path(tiles, cache_dir),
+                            lambda: build_pattern(self.canonical_goal, tiles))
+
+    def __call__(self, state, goal=None):
+        """ Sums the database entries of every tile group.
+
+            Args:
+                state (ndarray): Current state
+
+                goal (ndarray): Unused since the goal is fixed when the 
+                    databases are built. Kept for compatibility with the scalar 
+                    heuristic(state, goal) interface.
+        """
+        labels = self.labels
+        positions = [0] * self.size
+        for pos, tile in enumerate(np.asarray(state).ravel().tolist()):
+            positions[labels[tile]] = pos
+
+        h = 0
+        size = self.size
+        for tiles, table in zip(self.tiles, self.tables):
+            idx = 0
+            for tile in reversed(tiles):
+                idx = idx * size + positions[tile]
+            h += int(table[idx])
+
+        return h
+
+    def batch(self, states, goal=None):
+        """ Sums the database entries of a stack of states in a single call.
+
+            Args:
+                states (ndarray): (k, rows, cols) stack of states.
+
+                goal (ndarray): Unused, see __call__().
+
+            Returns:
+                A ndarray of k heuristic values.
+        """
+        # Flat position of every tile in each state
+        labels = np.asarray(self.labels)
+        positions = np.argsort(labels[states.reshape(len(states), -1)], axis=1)
+
+        h = np.zeros(len(states), dtype=np.int64)
+        for tiles, table in zip(self.tiles, self.tables):
+            radix = self.size ** np.arange(len(tiles))
+            h += table[positions[:, tiles] @ radix]
+
+        return h
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import collections
+import multiprocessing
+
+import numpy as np
+
+from a_star import get_engine
+from batch import read_instances, solve_instance
+from distance_table import DistanceTable, unrank
+from metrics import peak_rss
+
+def generate_corpus(goal, depths, per_depth, seed=0, cache_dir='tables'):
+    """ Draws random instances with a known optimal depth.
+
+        The exact distance table of the goal (see distance_table.py) lists every
+        state at each depth, so instances can be sampled uniformly per depth. The
+        same seed always gives the same corpus.
+
+        Args:
+            goal (ndarray): Goal state, 3x3 or smaller.
+
+            depths (list): Optimal solution lengths to draw instances for.
+
+            per_depth (int): Instances drawn for each depth, fewer if the depth
+                has fewer states.
+
+            seed (int): Seed of the random generator.
+
+            cache_dir (str): Directory the distance tables are stored in.
+
+        Returns:
+            A list of dictionaries with id, depth, init_state and goal_state.
+    """
+    goal = np.asarray(goal)
+    table = DistanceTable(goal, cache_dir=cache_dir)
+    distances = np.asarray(table.table)
+    tiles = np.argsort(table.labels) # tiles[canonical label] = original tile
+    rng = np.random.default_rng(seed)
+
+    corpus = []
+    for depth in depths:
+        ranks = np.flatnonzero(distances == depth)
+        if not len(ranks):
+            raise ValueError("No states at depth {}!".format(depth))
+        ranks = rng.choice(ranks, size=min(per_depth, len(ranks)), replace=False)
+        for i, perm in enumerate(unrank(np.sort(ranks), goal.size)):
+            corpus.append({
+                'id': 'depth-{}-{}'.format(depth, i),
+                'depth': int(depth),
+                'init_state': tiles[perm].reshape(goal.shape).tolist(),
+                'goal_state': goal.tolist(),
+            })
+
+    return corpus
+
+def load_corpus(path, params, depths, per_depth, seed=0):
+    """ Reads the corpus file, generating and saving it first if needed.
+
+        Args:
+            path (str): Location of the JSONL corpus.
+
+            params (dict): The `a_star` section of the config, the corpus is
+                drawn for its goal state.
+
+            depths, per_depth, seed: See generate_corpus().
+
+        Returns:
+            A dictionary mapping instance id to its depth.
+    """
+    if not os.path.exists(path):
+        corpus = generate_corpus(
+            params['goal_state'], depths, per_depth, seed=seed,
+            **(params.get('table') or {}))
+        with open(path, 'w') as stream:
+            for instance in corpus:
+                stream.write(json.dumps(instance) + '\n')
+
+    with open(path, 'r') as stream:
+        return {i['id']: i['depth'] for i in map(json.loads, stream) if i}
+
+def run_combination(job):
+    """ Solves the whole corpus with one engine and heuristic.
+
+        Run in a fresh process for every combination so the peak memory is
+        measured for that combination alone. Every instance is solved repeat
+        times and the fastest time is kept to reduce timer noise.
+
+        Args:
+            job (tuple): (engine name, heuristic name, corpus path, depths,
+                repeat, options) where options are the solve_instance() options.
+
+        Returns:
+            A (engine name, heuristic name, stats) tuple where stats holds the
+            peak RSS (KB) and the totals of every depth.
+    """
+    engine, heuristic, path, depths, repeat, options = job
+    totals = collections.OrderedDict()
+    for instance_id, init_state, goal_state in read_instances(path):
+        runs = [solve_instance((instance_id, init_state, goal_state, options))
+                for _ in range(repeat)]
+        if 'cost' not in runs[0]:
+            raise ValueError("{} failed on {}!".format(engine, instance_id))
+        result = min(runs, key=lambda r: r['time'])
+        bucket = totals.setdefault(str(depths[instance_id]), {
+            'instances': 0, 'time': 0.0, 'expanded': 0, 'generated': 0,
+            'peak_frontier': 0})
+        bucket['instances'] += 1
+        for key in ['time', 'expanded', 'generated']:
+            bucket[key] += result[key]
+        bucket['peak_frontier'] = max(
+            bucket['peak_frontier'], result.get('peak_frontier', 0))
+
+    return engine, heuristic, {'peak_rss_kb': peak_rss(), 'depths': totals}
+
+def compare(baseline, results, tolerances):
+    """ Lists the stats that got worse than the baseline.
+
+        Args:
+            baseline (dict): Results of an earlier run_regression().
+
+            results (dict): Results of the current run.
+
+            tolerances (dict): Allowed relative increase of time, expanded and
+                memory (peak RSS and peak frontier) e.g. 0.1 for 10%, and 
+                min_time, the seconds a time has to grow by to be reported so 
+                timer noise on tiny totals is ignored.
+
+        Returns:
+            A list of (combination, depth, stat, baseline value, new value).
+    """
+    regressions = []
+    stats = [('time', 'time'), ('expanded', 'expanded'),
+             ('peak_frontier', 'memory')]
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        before, after = old['peak_rss_kb'], result['peak_rss_kb']
+        if None not in (before, after) and after > before * (1 + tolerances['memory']):
+            regressions.append((name, '-', 'peak_rss_kb', before, after))
+        for depth, totals in result['depths'].items():
+            if depth not in old['depths']:
+                continue
+            for stat, kind in stats:
+                before, after = old['depths'][depth][stat], totals[stat]
+                if stat == 'time' and after - before < tolerances['min_time']:
+                    continue
+                if after > before * (1 + tolerances[kind]):
+                    regressions.append((name, depth, stat, before, after))
+
+    return regressions
+
+def run_regression(params, corpus, baseline, engines, heuristics, depths,
+                   per_depth=3, seed=0, repeat=1, tolerances=None, update=False):
+    """ Runs every engine and heuristic combination over a seeded corpus.
+
+        The totals of each combination are saved to the baseline file when it
+        does not exist yet (or update is set), otherwise they are compared to it
+        and every regression in time, nodes expanded or memory is reported.
+        Engines that do not use a heuristic are only run once.
+
+        Args:
+            params (dict): The `a_star` section of the config which selects the
+                goal, state representation, search options and the options of
+                each heuristic.
+
+            corpus (str): Location of the JSONL corpus, generated if missing.
+
+            baseline (str): Location of the JSON baseline.
+
+            engines (list): Names of the engines to run.
+
+            heuristics (list): Names of the heuristics to run.
+
+            depths, per_depth, seed: See generate_corpus().
+
+            repeat (int): Number of times each instance is solved, the fastest
+                time is kept.
+
+            tolerances (dict): See compare(). Defaults to 25% for time and
+                memory, 0% for nodes expanded, which is deterministic, and a
+                min_time of 0.05 seconds.
+
+            update (bool): If true the baseline is overwritten.
+
+        Returns:
+            The list of regressions (see compare()).
+    """
+    tolerances = dict({'time': 0.25, 'expanded': 0.0, 'memory': 0.25, 
+                       'min_time': 0.05},
+                      **(tolerances or {}))
+    instance_depths = load_corpus(corpus, params, depths, per_depth, seed=seed)
+
+    jobs = []
+    for engine in engines:
+        names = heuristics if get_engine(engine).uses_heuristic else heuristics[:1]
+        for heuristic in names:
+            options = {
+                'engine': engine,
+                'heuristic': heuristic,
+                'heuristic_kwargs': params.get(heuristic) or {},
+                'representation': params['representation'],
+                'search': params.get('search'),
+            }
+            jobs.append(
+                (engine, heuristic, corpus, instance_depths, repeat, options))
+
+    # One combination at a time, each in a new process
+    results = collections.OrderedDict()
+    with multiprocessing.Pool(1, maxtasksperchild=1) as pool:
+        for engine, heuristic, stats in pool.imap(run_combination, jobs):
+            if not get_engine(engine).uses_heuristic:
+                heuristic = '-'
+            results['{}/{}'.format(engine, heuristic)] = stats
+            print("Done: {}/{}".format(engine, heuristic), end="\r")
+
+    print("{:<30s}{:>6s}{:>12s}{:>12s}{:>10s}".format(
+        "Engine/Heuristic", "Depth", "Expanded", "Time (s)", "RSS (MB)"))
+    for name, stats in results.items():
+        rss = stats['peak_rss_kb']
+        for depth, totals in stats['depths'].items():
+            print("{:<30s}{:>6s}{:>12d}{:>12.4f}{:>10s}".format(
+                name, depth, totals['expanded'], totals['time'],
+                "{:.1f}".format(rss / 1024) if rss is not None else "n/a"))
+
+    if update or not os.path.exists(baseline):
+        with open(baseline, 'w') as stream:
+            json.dump({'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'results': results}, stream, indent=2)
+        print("Baseline saved to {}".format(baseline))
+        return []
+
+    with open(baseline, 'r') as stream:
+        regressions = compare(json.load(stream)['results'], results, tolerances)
+    for name, depth, stat, before, after in regressions:
+        print("REGRESSION {} depth {}: {} {} -> {}".format(
+            name, depth, stat, before, after))
+    if not regressions:
+        print("No regressions against {}".format(baseline))
+
+    return regressions
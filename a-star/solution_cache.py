@@ -0,0 +1,85 @@
+import time
+import sqlite3
+
+class SolutionCache(object):
+    """ On-disk cache of solved problems with least recently used eviction.
+
+        Solutions are stored as the moves of the blank, which do not depend on
+        the tile labels, so problems are keyed on their canonical form (see 
+        canonicalize()). Any relabeled version of a solved problem is then
+        answered straight from the cache. The cache is a SQLite database, which
+        allows several processes to share it.
+
+        Attributes:
+            path (str): Location of the database file.
+
+            capacity (int): Maximum number of solutions kept. The least recently
+                used solutions are evicted first.
+    """
+    def __init__(self, path='solutions.db', capacity=100000):
+        self.path = path
+        self.capacity = capacity
+        self.connection = sqlite3.connect(path, timeout=60)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions ("
+                "key TEXT PRIMARY KEY, moves TEXT NOT NULL, used REAL NOT NULL)")
+
+    @staticmethod
+    def key(state, goal):
+        """ Builds the cache key of a canonical problem.
+
+            Args:
+                state (ndarray): Canonical initial state.
+
+                goal (ndarray): Canonical goal state. Only its shape and blank
+                    position matter since its labels are fixed.
+        """
+        shape = 'x'.join(str(s) for s in state.shape)
+        blank = int((goal.ravel() == 0).argmax())
+        tiles = ','.join(str(t) for t in state.ravel().tolist())
+
+        return '{}:{}:{}'.format(shape, blank, tiles)
+
+    def get(self, key):
+        """ Looks up a solution, marking it as recently used.
+
+            Args:
+                key (str): Key built by SolutionCache.key().
+
+            Returns:
+                The moves of the blank as a string or None if not cached.
+        """
+        with self.connection:
+            row = self.connection.execute(
+                "SELECT moves FROM solutions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute(
+                "UPDATE solutions SET used = ? WHERE key = ?", (time.time(), key))
+
+        return row[0]
+
+    def put(self, key, moves):
+        """ Stores a solution, evicting the least recently used ones if full.
+
+            Args:
+                key (str): Key built by SolutionCache.key().
+
+                moves (str): Moves of the blank that solve the problem.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO solutions (key, moves, used) VALUES (?, ?, ?)",
+                (key, moves, time.time()))
+            size = self.connection.execute(
+                "SELECT COUNT(*) FROM solutions").fetchone()[0]
+            if size > self.capacity:
+                self.connection.execute(
+                    "DELETE FROM solutions WHERE key IN ("
+                    "SELECT key FROM solutions ORDER BY used LIMIT ?)",
+                    (size - self.capacity,))
+
+    def close(self):
+        """ Closes the database connection. """
+        self.connection.close()
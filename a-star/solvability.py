@@ -0,0 +1,200 @@
+import numpy as np
+
+def duplicate_check(a):
+    """ Check for duplicate values in a ndarray 
+    
+        Args:
+            a (ndarray): Array to be checked for duplicate values.
+    """
+    if len(np.unique(a.flatten())) != len(a.flatten()):
+        raise Exception("Duplicate numbers detected! Check initial and goal states!") 
+
+def canonicalize(state, goal):
+    """ Relabels a problem so its goal uses the base number system.
+
+        The goal's tiles are renamed 1, 2, ..., n-1 in row-major order (the blank
+        keeps its position and label) and the same renaming is applied to the
+        state. Relabeling does not change which moves solve a problem, so every
+        problem can be solved, cached and looked up through its canonical form.
+        Tiles can hold any distinct labels as long as the blank is 0, they are
+        looked up in the sorted goal tiles.
+
+        Example:
+            goal = [[80,70,60],[50,40,30],[20,10,0]]
+            labels = {0: 0, 10: 8, 20: 7, 30: 6, 40: 5, 50: 4, 60: 3, 70: 2, 80: 1}
+            canonical goal = [[1,2,3],[4,5,6],[7,8,0]]
+
+        Args:
+            state (ndarray): State to relabel.
+
+            goal (ndarray): Goal state, i.e. desired number system.
+
+        Returns:
+            The relabeled state, the relabeled goal and a dictionary labels where 
+            labels[tile] is the new label of tile.
+    """
+    state, goal = np.asarray(state), np.asarray(goal)
+    goal_flat = goal.ravel()
+    order = np.argsort(goal_flat, kind='stable')
+    tiles = goal_flat[order]
+    if (tiles[1:] == tiles[:-1]).any():
+        raise ValueError("Goal state holds duplicate tiles!")
+    if not (tiles == 0).any():
+        raise ValueError("Goal state has no blank (0)!")
+    if state.size != tiles.size or (np.sort(state, axis=None) != tiles).any():
+        raise ValueError("State tiles do not match the goal tiles!")
+
+    new = np.zeros(goal_flat.size, dtype=np.int64)
+    new[goal_flat != 0] = np.arange(1, goal_flat.size)
+    sorted_labels = new[order] # sorted_labels[i] is the new label of tiles[i]
+
+    def relabel(values):
+        return sorted_labels[np.searchsorted(tiles, values)]
+
+    labels = dict(zip(tiles.tolist(), sorted_labels.tolist()))
+
+    return relabel(state), relabel(goal), labels
+
+def inversions(values):
+    """ Counts the pairs of values that are out of order.
+
+        A bottom-up merge sort is used: whenever a value is taken from the right
+        half of a merge, every value left in the left half forms an inversion
+        with it. This takes O(n log n) time instead of comparing every pair.
+
+        Args:
+            values (list): Values to count the inversions of.
+
+        Returns:
+            The number of pairs i < j with values[i] > values[j].
+    """
+    values = list(values)
+    n = len(values)
+    count = 0
+    width = 1
+    while width < n:
+        merged = []
+        for lo in range(0, n, 2 * width):
+            left = values[lo:lo + width]
+            right = values[lo + width:lo + 2 * width]
+            i = j = 0
+            while i < len(left) and j < len(right):
+                if left[i] <= right[j]:
+                    merged.append(left[i])
+                    i += 1
+                else:
+                    merged.append(right[j])
+                    j += 1
+                    count += len(left) - i
+            merged.extend(left[i:])
+            merged.extend(right[j:])
+        values = merged
+        width *= 2
+
+    return count
+
+def solvable(state, goal, verbose=False):
+    """ Determine if any N x N sliding puzzle game is solvable.
+    
+        In order for this check to work with any goal I map all goals to the base 
+        number system. Once the mapping in place I check the number of inversions
+        (total amount of numbers that are out of order). For boards with an odd
+        width the problem is solvable if the inversions are even. For boards with
+        an even width a move up or down changes the inversion parity, so the 
+        number of rows between the state's blank and the goal's blank is added to
+        the inversions before checking if they are even.
+
+        Example:
+            base = [1,2,3,4,5,6,7,8]
+            goal = [8,7,6,5,4,3,2,1]
+            mapped = {8: 1, 7: 2, 6: 3, 5: 4, 4: 5, 3: 6, 2: 7, 1: 8}
+
+        The mapping is done by canonicalize() and the inversions are counted by
+        inversions().
+
+        Args:
+            state (ndarray): Initial state to test.
+
+            goal (ndarray): Goal state, i.e. desired number system.
+
+            verbose (bool): If true the inversions and blank row distance are
+                printed.
+        
+        Returns:
+            Returns true the the number of inversions (plus the blank row 
+            distance for even widths) is even (solvable) and false if it is 
+            odd (not solvable).
+    """
+    state, goal = np.asarray(state), np.asarray(goal)
+
+    # Map goal number system to base number system, dropping the blank
+    mapped = canonicalize(state, goal)[0].ravel()
+    invs = inversions(mapped[mapped != 0].tolist())
+    if verbose:
+        print("Total inversions: {}".format(invs))
+
+    # Even width boards also depend on the row of the blank
+    if state.shape[1] % 2 == 0:
+        blank_rows = abs(np.where(state == 0)[0][0] - np.where(goal == 0)[0][0])
+        if verbose:
+            print("Blank row distance: {}".format(blank_rows))
+        invs += blank_rows
+
+    return invs % 2 == 0
+
+def solvable_batch(states, goals):
+    """ Vectorized validity and solvability check of a stack of instances.
+
+        Every pair of tiles is compared at once, which for puzzle sized boards 
+        is much faster in NumPy than counting the inversions of each instance 
+        in Python.
+
+        Args:
+            states (ndarray): (m, rows, cols) stack of initial states.
+
+            goals (ndarray): (m, rows, cols) stack of goal states or a single 
+                (rows, cols) goal shared by every state.
+
+        Returns:
+            Two bool ndarrays of m entries, valid (both boards hold the same 
+            distinct tiles, one of them the blank 0) and solvable (only 
+            meaningful where valid).
+    """
+    states = np.asarray(states)
+    goals = np.broadcast_to(goals, states.shape)
+    m, rows, cols = states.shape
+    n = rows * cols
+    flat_states = states.reshape(m, n)
+    flat_goals = goals.reshape(m, n)
+
+    sorted_goals = np.sort(flat_goals, axis=1)
+    valid = (np.sort(flat_states, axis=1) == sorted_goals).all(axis=1) & \
+            (sorted_goals[:, 1:] != sorted_goals[:, :-1]).all(axis=1) & \
+            (sorted_goals == 0).any(axis=1)
+
+    # Replace the labels by their rank so any labels index like 0..n-1
+    tiles = np.arange(n)
+    blank = np.argmax(sorted_goals == 0, axis=1)[:, None]
+    flat_states = np.argsort(np.argsort(flat_states, axis=1), axis=1)
+    flat_goals = np.argsort(np.argsort(flat_goals, axis=1), axis=1)
+    flat_states = np.where(valid[:, None], flat_states, tiles)
+    flat_goals = np.where(valid[:, None], flat_goals, tiles)
+    blank = np.where(valid[:, None], blank, 0)
+
+    # Position of each tile in its goal, which orders tiles like canonicalize()
+    order = np.empty((m, n), dtype=np.int64)
+    order[np.arange(m)[:, None], flat_goals] = tiles
+    mapped = np.take_along_axis(order, flat_states, axis=1)
+
+    tile = flat_states != blank
+    later = np.triu(np.ones((n, n), dtype=bool), 1)
+    pairs = (mapped[:, :, None] > mapped[:, None, :]) & later
+    pairs &= tile[:, :, None] & tile[:, None, :]
+    invs = pairs.sum(axis=(1, 2))
+
+    if cols % 2 == 0:
+        state_rows = np.argmax(flat_states == blank, axis=1) // cols
+        goal_rows = np.argmax(flat_goals == blank, axis=1) // cols
+        invs += np.abs(state_rows - goal_rows)
+
+    return valid, invs % 2 == 0
@@ -0,0 +1,43 @@
+import os
+import tempfile
+
+import numpy as np
+
+from a_star import AStar, get_engine
+from heuristics import manhattan
+
+GOAL = np.array([[1, 2, 3], [4, 5, 6], [7, 8, 0]])
+INIT = np.array([[8, 6, 7], [2, 5, 4], [3, 0, 1]])
+
+def test_solve_bounded_shared_spill_dir():
+    """ Solves sharing a spill_dir must not see each other's spilled states. """
+    spill_dir = tempfile.mkdtemp()
+    deep = INIT
+    shallow = np.array([[1, 2, 3], [4, 5, 6], [0, 7, 8]])
+
+    lengths = []
+    for init in [deep, shallow, deep]:
+        engine = AStar(init, GOAL, packed=True)
+        assert engine.solve_bounded(manhattan, max_nodes=50, spill_dir=spill_dir,
+                                    verbose=False)
+        lengths.append(len(engine.solution_path(engine.solution)) - 1)
+
+    assert lengths == [31, 2, 31]
+    assert os.listdir(spill_dir) == []
+
+def test_engines_record_duplicates_and_peak_frontier():
+    """ Every searching engine fills in the same metrics as solve(). """
+    runs = [('astar', {}), ('astar', {'weight': 3, 'time_budget': 5}),
+            ('astar', {'max_nodes': 500}), ('idastar', {}), ('bidirectional', {})]
+    for name, options in runs:
+        result = get_engine(name)(INIT, GOAL).search(manhattan, **options)
+        assert result.cost == 31
+        assert result.metrics['duplicates'] > 0, (name, options)
+        assert result.metrics['peak_frontier'] > 0, (name, options)
+
+def test_solve_mixed_dtypes():
+    """ The goal is found when the initial and goal states differ in dtype. """
+    init = np.array([[1, 2, 3], [4, 5, 6], [7, 0, 8]], dtype=np.int32)
+    engine = AStar(init, GOAL.astype(np.int64))
+    assert engine.solve(manhattan, verbose=False)
+    assert len(engine.solution_path(engine.solution)) - 1 == 1
@@ -0,0 +1,26 @@
+import random
+import tempfile
+
+from frontier import SpillingFrontier
+
+def test_spilling_frontier_stays_within_capacity():
+    """ Loading spilled buckets back must not grow the heap past its capacity. """
+    rng = random.Random(0)
+    for capacity in [1, 2, 7, 50]:
+        open_set = SpillingFrontier(capacity, tempfile.mkdtemp())
+        pending = []
+        for step in range(3000):
+            if pending and rng.random() < 0.4:
+                f, entry = open_set.pop()
+                assert f == min(pending)
+                pending.remove(f)
+            else:
+                f = rng.randrange(20)
+                open_set.push(f, (step, f))
+                pending.append(f)
+            assert len(open_set.heap) <= capacity
+            assert len(open_set) == len(pending)
+
+        popped = [open_set.pop()[0] for _ in range(len(pending))]
+        assert popped == sorted(pending)
+        assert not open_set and not open_set.buckets
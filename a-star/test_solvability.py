@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from solvability import canonicalize, solvable, solvable_batch
+
+def test_solvable_arbitrary_labels():
+    """ Tiles do not have to be labeled 0..n-1. """
+    goal = np.array([[10, 20, 30], [40, 50, 60], [70, 80, 0]])
+    assert solvable([[10, 20, 30], [40, 50, 60], [70, 0, 80]], goal)
+    assert not solvable([[20, 10, 30], [40, 50, 60], [70, 80, 0]], goal)
+
+    valid, can_solve = solvable_batch(
+        np.array([[[10, 20, 30], [40, 50, 60], [70, 0, 80]],
+                  [[-5, 20, 30], [40, 50, 60], [70, 80, 0]]]), goal)
+    assert valid.tolist() == [True, False]
+    assert can_solve[0]
+
+def test_canonicalize_mismatched_tiles():
+    with pytest.raises(ValueError):
+        canonicalize([[1, 2, 3], [4, 5, 6], [7, 8, 9]],
+                     [[1, 2, 3], [4, 5, 6], [7, 8, 0]])